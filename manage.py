@@ -1,71 +1,336 @@
+import contextlib
+import importlib
 import json
 import os
 import pathlib
 import platform
 import re
 import shlex
+import shutil
 import subprocess
 import sys
-import toml
+import time
 import click
 import tempfile
+import threading
+from functools import partial
 
 
 ROOT_PATH = pathlib.Path(__file__).parent.resolve()
 SCRIPTS_FOLDER = ROOT_PATH / "scripts"
 sys.path.insert(0, SCRIPTS_FOLDER.as_posix())
 repositiories_json_file = ROOT_PATH / "repositories.json"
+ADDONS_FOLDER = ROOT_PATH / "addons"
+RELEASE_LOGS_FOLDER = ROOT_PATH / "logs" / "release"
+CACHE_FOLDER = ROOT_PATH / ".cache"
+RELEASE_WORKTREES_FOLDER = CACHE_FOLDER / "release-worktrees"
+DEFAULT_JOBS = min(8, (os.cpu_count() or 1) * 2)
+# Parallel git calls must never block on an interactive credential prompt
+GIT_ENV = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+MIRROR_CACHE_ENV = "AYON_WORKSPACE_MIRROR_CACHE"
+DAEMON_START_TIMEOUT = 60
+CLONE_OPTION_DEFAULTS = {
+    "depth": None,
+    "filter": None,
+    "sparse_paths": [],
+    "submodules": True,
+}
+_mirror_locks = {}
+_mirror_locks_guard = threading.Lock()
 
-import upload_addons
-import create_addon
 
+class LazyGroup(click.Group):
+    """Group importing commands from scripts only when they are invoked.
 
-@click.group()
+    Modules of the commands import 'ayon_api', 'jinja2' and others, which
+    would slow down every command. Help of lazy commands is defined here,
+    so listing commands does not import them either.
+
+    Args:
+        lazy_commands (dict[str, tuple[str, str, str]]): Module, attribute
+            and short help of each command by its name.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            module_name, attr_name, _ = self.lazy_commands[cmd_name]
+            module = importlib.import_module(module_name)
+            self.add_command(getattr(module, attr_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx, formatter):
+        cmd_names = self.list_commands(ctx)
+        limit = formatter.width - 6 - max(map(len, cmd_names), default=0)
+        rows = []
+        for cmd_name in cmd_names:
+            if cmd_name in self.commands:
+                command = self.commands[cmd_name]
+                if command.hidden:
+                    continue
+                short_help = command.get_short_help_str(limit)
+            else:
+                # Placeholder shortens help same as the real command
+                short_help = click.Command(
+                    cmd_name, help=self.lazy_commands[cmd_name][2]
+                ).get_short_help_str(limit)
+            rows.append((cmd_name, short_help))
+
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_commands={
+        "addons": (
+            "upload_addons",
+            "upload_addons_cli",
+            "Creates packages and uploads them to the server configured in the .env file.",
+        ),
+        "create-addon": (
+            "create_addon",
+            "create_addon_cli",
+            "Creates a new addon from template.",
+        ),
+        "watch": (
+            "addon_watcher",
+            "watch_cli",
+            "Repackages addon when its files change and deploys it.",
+        ),
+    },
+)
 def cli():
     pass
 
 
+mirror_cache_option = click.option(
+    "--mirror-cache",
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+    envvar=MIRROR_CACHE_ENV,
+    default=None,
+    help=(
+        "Directory with bare mirrors shared between workspaces. Clones "
+        f"borrow objects from it. Defaults to ${MIRROR_CACHE_ENV}."
+    ),
+)
+
+
 @click.command(name="release", help="Builds a release for each addon.")
 @click.option("--bump-version", is_flag=True, help="Bump version in pyproject.toml before building.")
 @click.option("--upload-release", is_flag=True, help="Upload release to GitHub after building.")
-@click.option("--addon-name", is_flag=True, help="Define which addon to release.")
-def build_releases(bump_version, upload_release, addon_name):
-    with open(repositiories_json_file.as_posix(), 'r', encoding='utf-8') as config_file:
-        project_data = json.load(config_file)
+@click.option("--addon-name", default=None, help="Define which addon to release.")
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=DEFAULT_JOBS,
+    show_default=True,
+    help="Number of addons to build at the same time.",
+)
+@click.option(
+    "--worktrees",
+    is_flag=True,
+    help=(
+        "Build from dedicated git worktrees per addon and branch instead "
+        "of switching the checkouts in addons/."
+    ),
+)
+@click.option(
+    "--worktree-cache",
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+    default=RELEASE_WORKTREES_FOLDER,
+    show_default=True,
+    help="Directory holding the release worktrees.",
+)
+def build_releases(
+    bump_version, upload_release, addon_name, jobs, worktrees, worktree_cache
+):
+    project_data = load_repositories_config()
 
+    releases = []
     for organisation, branch in project_data["release_builder"]["organisations"].items():
-        print(f"Processing organisation: {organisation}")
-        for name, url in project_data["repositories"]["addons"].items():
+        for name, repository in project_data["repositories"]["addons"].items():
             if addon_name and name != addon_name:
                 continue
 
-            print(f"Processing addon: {name}")
+            url = get_repository_url(repository)
             if re.search(r"https://github\.com/" + organisation, url):
+                print(f"Queued addon {name} of {organisation} ({branch})")
                 path = ROOT_PATH / "addons" / name
-                if not path.exists():
-                    get_repository(name, path, url)
+                releases.append((name, path, repository, branch))
 
-                os.chdir(path)
-                subprocess.call(f"git switch {branch}", shell=True)
-                subprocess.call("git pull", shell=True)
+    # Process pool pulls in multiprocessing, only release builds need it
+    from concurrent.futures import ProcessPoolExecutor
+
+    _, failed = run_repository_tasks(
+        partial(
+            build_release,
+            bump_version=bump_version,
+            upload_release=upload_release,
+            worktree_cache=worktree_cache if worktrees else None,
+        ),
+        releases,
+        jobs,
+        executor_class=ProcessPoolExecutor,
+        # Several organisations may release other branches of one addon
+        get_label=lambda release: f"{release[0]}@{release[3]}",
+    )
+    if failed:
+        sys.exit(1)
+
+
+def _run_logged(command, cwd):
+    """Runs ``command`` in ``cwd`` and prints its output to the current log."""
+    print(f"$ {shlex.join(command)}", flush=True)
+    result = subprocess.run(
+        command,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        env=GIT_ENV,
+    )
+    print(result.stdout, end="", flush=True)
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"'{shlex.join(command)}' exited with {result.returncode}"
+        )
 
-                pyproject_file = path / "pyproject.toml"
-                if bump_version and pyproject_file.exists():
-                    version = bump_version_in_pyproject(pyproject_file)
-                    update_version_in_package(path, version)
-                else:
-                    version = get_current_version(pyproject_file)
 
-                create_package_path = path / "create_package.py"
-                if create_package_path.exists():
-                    subprocess.call(f"python {create_package_path.as_posix()}", shell=True)
+def _get_safe_branch_name(branch):
+    return re.sub(r"[^\w.-]+", "_", branch)
 
-                if upload_release:
-                    name = get_addon_name(pyproject_file)
-                    upload_release_to_github(name, version, name, path)
+
+def update_release_worktree(path, branch, worktree_cache):
+    """Creates or updates the release worktree of ``branch``.
+
+    The worktree is detached at the fetched upstream branch, so it never
+    conflicts with the branch checked out in ``path``. Updating only
+    rewrites files that changed since the previous build.
+
+    Returns:
+        pathlib.Path: Path to the worktree.
+    """
+    worktree_path = worktree_cache / _get_safe_branch_name(branch)
+    _run_logged(["git", "fetch", "origin", branch], path)
+    upstream = f"origin/{branch}"
+    if not (worktree_path / ".git").exists():
+        shutil.rmtree(worktree_path, ignore_errors=True)
+        worktree_path.parent.mkdir(parents=True, exist_ok=True)
+        _run_logged(["git", "worktree", "prune"], path)
+        _run_logged(
+            [
+                "git",
+                "worktree",
+                "add",
+                "--detach",
+                worktree_path.as_posix(),
+                upstream,
+            ],
+            path,
+        )
+    else:
+        # Version bumps of a previous build are not committed, drop them
+        _run_logged(
+            ["git", "checkout", "--force", "--detach", upstream],
+            worktree_path,
+        )
+
+    if (worktree_path / ".gitmodules").exists():
+        _run_logged(
+            ["git", "submodule", "update", "--init", "--recursive"],
+            worktree_path,
+        )
+    return worktree_path
+
+
+def build_release(
+    name,
+    path,
+    repository,
+    branch,
+    bump_version=False,
+    upload_release=False,
+    worktree_cache=None,
+):
+    """Builds the release of one addon with all output going to its log.
+
+    Every step runs with an explicit working directory so several addons
+    can be built at the same time on a process pool. With
+    ``worktree_cache`` the build runs in a dedicated worktree and the
+    checkout in ``path`` is left untouched.
+    """
+    log_path = (
+        RELEASE_LOGS_FOLDER / f"{name}-{_get_safe_branch_name(branch)}.log"
+    )
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "w", encoding="utf-8") as log_file:
+        with contextlib.redirect_stdout(log_file):
+            try:
+                version = _build_release(
+                    name,
+                    path,
+                    repository,
+                    branch,
+                    bump_version,
+                    upload_release,
+                    worktree_cache,
+                )
+            except Exception as error:
+                print(f"❌ {error}")
+                raise RuntimeError(f"{error} (log: {log_path})") from None
+    return f"built {version} (log: {log_path})"
+
+
+def _build_release(
+    name,
+    path,
+    repository,
+    branch,
+    bump_version,
+    upload_release,
+    worktree_cache,
+):
+    print(f"Processing addon: {name} ({branch})")
+    if not path.exists():
+        get_repository(name, path, repository)
+
+    if worktree_cache:
+        path = update_release_worktree(path, branch, worktree_cache / name)
+    else:
+        _run_logged(["git", "switch", branch], path)
+        _run_logged(["git", "pull"], path)
+
+    pyproject_file = path / "pyproject.toml"
+    if bump_version and pyproject_file.exists():
+        version = bump_version_in_pyproject(pyproject_file)
+        update_version_in_package(path, version)
+    else:
+        version = get_current_version(pyproject_file)
+    # Resolved before building so a missing name never gets tagged
+    if upload_release:
+        name = get_addon_name(pyproject_file)
+
+    create_package_path = path / "create_package.py"
+    if create_package_path.exists():
+        _run_logged(["python", create_package_path.as_posix()], path)
+
+    if upload_release:
+        upload_release_to_github(name, version, name, path)
+    return version
 
 
 def bump_version_in_pyproject(pyproject_file):
+    import toml
+
     with open(pyproject_file, "r", encoding="utf-8") as f:
         data = toml.load(f)
 
@@ -81,16 +346,24 @@ def bump_version_in_pyproject(pyproject_file):
     return new_version
 
 
+def _get_pyproject_value(pyproject_file, attribute, key):
+    import addon_index
+
+    value = getattr(addon_index.get_addon(pyproject_file.parent), attribute)
+    if value is None:
+        raise click.ClickException(
+            f"Addon '{pyproject_file.parent.name}' has no 'tool.poetry.{key}'"
+            f" in {pyproject_file.as_posix()}."
+        )
+    return value
+
+
 def get_current_version(pyproject_file):
-    with open(pyproject_file, "r", encoding="utf-8") as f:
-        data = toml.load(f)
-    return data["tool"]["poetry"]["version"]
+    return _get_pyproject_value(pyproject_file, "pyproject_version", "version")
 
 
 def get_addon_name(pyproject_file):
-    with open(pyproject_file, "r", encoding="utf-8") as f:
-        data = toml.load(f)
-    return data["tool"]["poetry"]["name"]
+    return _get_pyproject_value(pyproject_file, "pyproject_name", "name")
 
 
 def update_version_in_package(package_path, version):
@@ -114,8 +387,8 @@ def upload_release_to_github(repo_name, version, name, repo_path):
     print(f"Uploading {repo_name} v{version} to GitHub...")
     last_tag = get_last_tag(repo_path)
     tag_name = f"{version}"
-    subprocess.call(f"git tag {tag_name}", shell=True)
-    subprocess.call("git push --tags", shell=True)
+    _run_logged(["git", "tag", tag_name], repo_path)
+    _run_logged(["git", "push", "--tags"], repo_path)
 
     release_notes = f"Release {version} for {repo_name}\n\n"
     commit_messages = get_commit_messages_since_last_tag(last_tag, repo_path)
@@ -125,14 +398,17 @@ def upload_release_to_github(repo_name, version, name, repo_path):
         temp_file.write(release_notes)
         temp_file_path = temp_file.name
 
+    release_command = ["gh", "release", "create", tag_name]
     release_file = repo_path / f"{name}-{version}.zip"
     if release_file.exists():
-        subprocess.call(
-            f'gh release create {tag_name} {release_file.as_posix()} --title "{repo_name} {version}" --notes-file "{temp_file_path}"',
-            shell=True)
-    else:
-        subprocess.call(f'gh release create {tag_name} --title "{repo_name} {version}" --notes-file "{temp_file_path}"',
-                        shell=True)
+        release_command.append(release_file.as_posix())
+    release_command += [
+        "--title",
+        f"{repo_name} {version}",
+        "--notes-file",
+        temp_file_path,
+    ]
+    _run_logged(release_command, repo_path)
 
     print(f"✅ Release {repo_name} v{version} uploaded to GitHub.")
 
@@ -156,26 +432,634 @@ def get_commit_messages_since_last_tag(last_tag, repo_path):
         return "No new commits since last release."
 
 
-def get_repository(repository_name, path, repo_url):
+def _git_error(result):
+    stderr = result.stderr.strip()
+    if stderr:
+        return stderr.splitlines()[-1]
+    return f"{shlex.join(result.args)} exited with {result.returncode}"
+
+
+def get_mirror_path(mirror_cache, repo_url):
+    """Returns the bare mirror location of ``repo_url`` in the cache.
+
+    The path is derived from the url only, so every workspace sharing the
+    cache directory also shares the mirrors.
+    """
+    location = re.sub(r"^[\w+]+://", "", repo_url.strip()).rstrip("/")
+    location = re.sub(r"^[^@/]+@", "", location)
+    location = location.replace("\\", "/").replace(":", "/")
+    parts = [
+        re.sub(r"[^\w.-]+", "_", part)
+        for part in location.split("/")
+        if part not in ("", ".", "..")
+    ]
+    if not parts[-1].endswith(".git"):
+        parts[-1] += ".git"
+    return mirror_cache.joinpath(*parts)
+
+
+def _get_mirror_lock(mirror_path):
+    with _mirror_locks_guard:
+        return _mirror_locks.setdefault(mirror_path, threading.Lock())
+
+
+def update_mirror(mirror_cache, repo_url):
+    """Creates or refreshes the bare mirror of ``repo_url``."""
+    mirror_path = get_mirror_path(mirror_cache, repo_url)
+    with _get_mirror_lock(mirror_path):
+        if (mirror_path / "HEAD").exists():
+            _git(mirror_path, "remote", "update", "--prune")
+            return "mirror updated"
+
+        # Clone next to the final location so an interrupted clone never
+        # leaves a half populated mirror behind. The lock guards only this
+        # process, other workspaces sharing the cache clone to their own
+        # folder and the first one renamed wins
+        mirror_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = pathlib.Path(
+            tempfile.mkdtemp(
+                prefix=f"{mirror_path.name}.", suffix=".tmp",
+                dir=mirror_path.parent,
+            )
+        )
+        try:
+            _git(
+                mirror_path.parent,
+                "clone",
+                "--mirror",
+                "--quiet",
+                repo_url,
+                tmp_path.as_posix(),
+            )
+            try:
+                tmp_path.rename(mirror_path)
+            except OSError:
+                if not (mirror_path / "HEAD").exists():
+                    raise
+                return "mirror created by another process"
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return "mirror created"
+
+
+def get_repository_url(repository):
+    """Returns the url of a ``repositories.json`` entry.
+
+    Entries are either a plain url string or an object with an ``url`` key
+    and optional clone options, see ``get_clone_options``.
+    """
+    if isinstance(repository, str):
+        return repository
+    return repository["url"]
+
+
+def get_clone_options(repository):
+    """Returns validated clone options of a ``repositories.json`` entry.
+
+    Supported keys of the object form are:
+        depth (int): Create a shallow clone with this many commits.
+        filter (str): Partial clone filter, e.g. ``blob:none``.
+        sparse_paths (list[str]): Directories checked out in cone mode.
+        submodules (bool | str): ``false`` skips submodules, ``parallel``
+            clones them on several jobs. Defaults to ``true``.
+    """
+    options = dict(CLONE_OPTION_DEFAULTS)
+    if isinstance(repository, str):
+        return options
+
+    unknown_keys = set(repository) - set(CLONE_OPTION_DEFAULTS) - {"url"}
+    if unknown_keys:
+        raise ValueError(
+            f"Unknown repository options: {', '.join(sorted(unknown_keys))}"
+        )
+    options.update({key: repository[key] for key in repository if key != "url"})
+
+    depth = options["depth"]
+    if depth is not None and (
+        isinstance(depth, bool) or not isinstance(depth, int) or depth < 1
+    ):
+        raise ValueError(f"'depth' must be a positive integer, got {depth!r}")
+    if options["filter"] is not None and not isinstance(options["filter"], str):
+        raise ValueError(f"'filter' must be a string, got {options['filter']!r}")
+    if not isinstance(options["sparse_paths"], list):
+        raise ValueError("'sparse_paths' must be a list of paths")
+    if options["submodules"] not in (True, False, "parallel"):
+        raise ValueError(
+            "'submodules' must be true, false or \"parallel\", "
+            f"got {options['submodules']!r}"
+        )
+    return options
+
+
+def _get_submodule_args(clone_options):
+    if clone_options["submodules"] == "parallel":
+        return ["--recursive", f"--jobs={DEFAULT_JOBS}"]
+    if clone_options["submodules"]:
+        return ["--recursive"]
+    return []
+
+
+def get_repository(repository_name, path, repository, mirror_cache=None):
     if path.exists():
-        print(f"Repository {repository_name} already exists")
-        return
+        return "already exists"
+
+    repo_url = get_repository_url(repository)
+    clone_options = get_clone_options(repository)
     path.parent.mkdir(parents=True, exist_ok=True)
 
-    git_command = f"git clone --recursive {repo_url} {path.as_posix()}"
-    subprocess.call(git_command, shell=True)
+    clone_args = _get_submodule_args(clone_options)
+    if clone_options["depth"]:
+        clone_args += [
+            f"--depth={clone_options['depth']}",
+            "--no-single-branch",
+        ]
+        if clone_options["submodules"]:
+            clone_args.append("--shallow-submodules")
+    if clone_options["filter"]:
+        clone_args.append(f"--filter={clone_options['filter']}")
+    if clone_options["sparse_paths"]:
+        clone_args.append("--sparse")
 
+    if mirror_cache:
+        update_mirror(mirror_cache, repo_url)
+        mirror_path = get_mirror_path(mirror_cache, repo_url)
+        clone_args += [
+            "--reference-if-able",
+            mirror_path.as_posix(),
+            "--dissociate",
+        ]
 
-@cli.command(help="Pulls all configured repositiories, see pyproject.toml.")
-def get_repositories():
+    result = subprocess.run(
+        [
+            "git",
+            "clone",
+            *clone_args,
+            repo_url,
+            path.as_posix(),
+        ],
+        capture_output=True,
+        text=True,
+        env=GIT_ENV,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(_git_error(result))
+
+    if clone_options["sparse_paths"]:
+        _git(path, "sparse-checkout", "set", *clone_options["sparse_paths"])
+    return "cloned"
+
+
+def load_repositories_config():
     with open(repositiories_json_file.as_posix(), 'r', encoding='utf-8') as config_file:
-        project_data = json.load(config_file)
+        return json.load(config_file)
+
+
+def iter_repositories(project_data):
+    """Yields ``(name, path, repository)`` for every configured repository.
+
+    ``repository`` is the raw ``repositories.json`` entry, either an url or
+    an object with clone options.
+    """
     for category, data in project_data["repositories"].items():
         if category == "docker":
             category = "repos/ayon-docker"
-        for name, url in data.items():
-            path = ROOT_PATH / category / name
-            get_repository(name, path, url)
+        for name, repository in data.items():
+            yield name, ROOT_PATH / category / name, repository
+
+
+def _run_timed(task, *args):
+    start = time.perf_counter()
+    try:
+        return task(*args), None, time.perf_counter() - start
+    except Exception as error:
+        return None, error, time.perf_counter() - start
+
+
+def run_repository_tasks(
+    task, repositories, jobs, executor_class=None, get_label=None
+):
+    """Runs ``task(name, path, repository, ...)`` for each item on a pool.
+
+    A failing or slow task never aborts the others, every result is
+    reported as soon as it finishes and a summary is printed at the end.
+    Items sharing a ``path`` use the same checkout, they run one after
+    another in the given order.
+
+    Args:
+        get_label (Callable): Returns name of item in the report,
+            defaults to its ``name``.
+
+    Returns:
+        tuple[list[str], dict[str, str]]: Labels of succeeded items and
+            error messages of failed ones.
+    """
+    # Imported on use, 'concurrent.futures' slows down every command
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    if executor_class is None:
+        executor_class = ThreadPoolExecutor
+    repositories = list(repositories)
+    total = len(repositories)
+    queues = {}
+    for index, repository in enumerate(repositories):
+        path = repository[1] if repository[1] is not None else index
+        queues.setdefault(path, []).append(repository)
+
+    succeeded = []
+    failed = {}
+    start = time.perf_counter()
+    with executor_class(max_workers=max(1, jobs)) as executor:
+        futures = {}
+
+        def submit(queue):
+            repository = queue.pop(0)
+            future = executor.submit(_run_timed, task, *repository)
+            futures[future] = (repository, queue)
+
+        for queue in queues.values():
+            submit(queue)
+        index = 0
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                repository, queue = futures.pop(future)
+                if queue:
+                    submit(queue)
+                index += 1
+                label = get_label(repository) if get_label else repository[0]
+                message, error, elapsed = future.result()
+                if error is None:
+                    succeeded.append(label)
+                    print(
+                        f"[{index}/{total}] ✅ {label}: {message}"
+                        f" ({elapsed:.1f}s)"
+                    )
+                else:
+                    failed[label] = str(error)
+                    print(
+                        f"[{index}/{total}] ❌ {label}: {error}"
+                        f" ({elapsed:.1f}s)"
+                    )
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"\nFinished in {elapsed:.1f}s: "
+        f"{len(succeeded)} succeeded, {len(failed)} failed."
+    )
+    for name in sorted(failed):
+        print(f"\t- {name}: {failed[name].splitlines()[0]}")
+    return succeeded, failed
+
+
+@cli.command(help="Pulls all configured repositiories, see pyproject.toml.")
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=DEFAULT_JOBS,
+    show_default=True,
+    help="Number of repositories to clone at the same time.",
+)
+@mirror_cache_option
+def get_repositories(jobs, mirror_cache):
+    project_data = load_repositories_config()
+    _, failed = run_repository_tasks(
+        partial(get_repository, mirror_cache=mirror_cache),
+        iter_repositories(project_data),
+        jobs,
+    )
+    if failed:
+        sys.exit(1)
+
+
+def _git(path, *args, check=True):
+    result = subprocess.run(
+        ["git", *args], cwd=path, capture_output=True, text=True, env=GIT_ENV
+    )
+    if check and result.returncode != 0:
+        raise RuntimeError(_git_error(result))
+    return result.stdout.strip()
+
+
+def sync_repository(repository_name, path, repository, mirror_cache=None):
+    """Fast-forwards an existing checkout to its upstream branch.
+
+    Missing repositories are cloned. A single ``ls-remote`` is compared
+    against the local HEAD so nothing is fetched when upstream did not
+    change. Detached, untracked and dirty checkouts are left untouched.
+    """
+    if not path.exists():
+        return get_repository(repository_name, path, repository, mirror_cache)
+
+    branch_ref = _git(path, "symbolic-ref", "-q", "HEAD", check=False)
+    if not branch_ref:
+        return "skipped, detached HEAD"
+
+    branch_info = _git(
+        path,
+        "for-each-ref",
+        "--format=%(objectname) %(upstream:remotename) %(upstream:remoteref)",
+        branch_ref,
+    ).split()
+    if len(branch_info) != 3:
+        return "skipped, no upstream branch"
+    head, remote, merge_ref = branch_info
+
+    remote_line = _git(path, "ls-remote", remote, merge_ref)
+    if not remote_line:
+        raise RuntimeError(f"{merge_ref} was not found on {remote}")
+    remote_head = remote_line.split()[0]
+    if remote_head == head:
+        return "up to date"
+
+    if _git(path, "status", "--porcelain", "--untracked-files=no"):
+        return "skipped, dirty working tree"
+
+    has_remote_head = subprocess.run(
+        ["git", "cat-file", "-e", f"{remote_head}^{{commit}}"],
+        cwd=path,
+        capture_output=True,
+    )
+    if has_remote_head.returncode != 0:
+        _git(path, "fetch", "--quiet", remote)
+
+    is_ancestor = subprocess.run(
+        ["git", "merge-base", "--is-ancestor", remote_head, head],
+        cwd=path,
+        capture_output=True,
+    )
+    if is_ancestor.returncode == 0:
+        return "up to date, ahead of upstream"
+
+    _git(path, "merge", "--ff-only", "--quiet", remote_head)
+    submodule_args = _get_submodule_args(get_clone_options(repository))
+    if submodule_args and (path / ".gitmodules").exists():
+        _git(path, "submodule", "update", "--init", *submodule_args)
+    return f"updated {head[:8]}..{remote_head[:8]}"
+
+
+@cli.command(help="Fetches and fast-forwards all configured repositories.")
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=DEFAULT_JOBS,
+    show_default=True,
+    help="Number of repositories to sync at the same time.",
+)
+@mirror_cache_option
+def sync(jobs, mirror_cache):
+    project_data = load_repositories_config()
+    _, failed = run_repository_tasks(
+        partial(sync_repository, mirror_cache=mirror_cache),
+        iter_repositories(project_data),
+        jobs,
+    )
+    if failed:
+        sys.exit(1)
+
+
+@cli.command(
+    name="update-mirrors",
+    help="Creates or refreshes the bare mirrors in the mirror cache.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=DEFAULT_JOBS,
+    show_default=True,
+    help="Number of mirrors to update at the same time.",
+)
+@mirror_cache_option
+def update_mirrors(jobs, mirror_cache):
+    if not mirror_cache:
+        raise click.UsageError(
+            f"Set --mirror-cache or ${MIRROR_CACHE_ENV} to update mirrors."
+        )
+
+    project_data = load_repositories_config()
+    # Repositories sharing an url share the mirror as well
+    mirrors = {}
+    for name, _, repository in iter_repositories(project_data):
+        mirrors.setdefault(get_repository_url(repository), name)
+
+    _, failed = run_repository_tasks(
+        lambda name, path, url: update_mirror(mirror_cache, url),
+        [(name, None, url) for url, name in mirrors.items()],
+        jobs,
+    )
+    if failed:
+        sys.exit(1)
+
+
+def get_addon_path(addon):
+    """Addon folder by name in 'addons' folder or by path."""
+    addon_path = ADDONS_FOLDER / addon
+    if not addon_path.is_dir():
+        addon_path = pathlib.Path(addon)
+    if not addon_path.is_dir():
+        raise click.BadParameter(f"Addon '{addon}' was not found.")
+    return addon_path.resolve()
+
+
+@cli.command(help="Prints fingerprint of addon sources or files changed since one.")
+@click.argument("addon")
+@click.option("--since", default=None, help="Fingerprint of previous scan.")
+def fingerprint(addon, since):
+    import fingerprint_index
+
+    start = time.perf_counter()
+    index = fingerprint_index.get_index(get_addon_path(addon))
+    if not since:
+        print(index.scan())
+        print(f"Scanned in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+        return
+
+    changes = index.changed_since(since)
+    if changes is None:
+        raise click.ClickException(f"Snapshot of '{since}' is not available.")
+    for prefix, paths in (
+        ("A", changes.added),
+        ("M", changes.modified),
+        ("D", changes.removed),
+    ):
+        for path in paths:
+            print(f"{prefix} {path}")
+
+
+@cli.command(help="Shows shared addon environments and their disk use.")
+@click.option(
+    "--prune",
+    is_flag=True,
+    help="Remove least recently used environments above the limit.",
+)
+@click.option(
+    "--max-envs",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Limit of kept environments, defaults to $AYON_WORKSPACE_MAX_ENVS or 8.",
+)
+def envs(prune, max_envs):
+    import env_cache
+
+    if prune:
+        for key in env_cache.evict_environments(max_envs):
+            print(f"Removed {key}")
+
+    index = env_cache.load_index()
+    total_size = 0
+    for key, entry in sorted(
+        index["envs"].items(),
+        key=lambda item: item[1].get("last_used", 0),
+        reverse=True,
+    ):
+        env_path = env_cache.ENVS_FOLDER / key
+        if not env_path.exists():
+            continue
+        size = env_cache.get_folder_size(env_path)
+        total_size += size
+        last_used = time.strftime(
+            "%Y-%m-%d %H:%M", time.localtime(entry.get("last_used", 0))
+        )
+        print(
+            f"{key}  {size / 2**20:8.1f} MB  last used {last_used}"
+            f"  hits {entry['hits']:<4} {', '.join(entry['addons'])}"
+        )
+
+    requests = index["hits"] + index["misses"]
+    hit_rate = index["hits"] / requests * 100 if requests else 0
+    print(
+        f"Total {total_size / 2**20:.1f} MB, hit rate {hit_rate:.0f}%"
+        f" ({index['hits']} of {requests})"
+    )
+
+
+@cli.command(name="list", help="Lists addons in the workspace with their versions.")
+@click.argument("paths", nargs=-1, type=click.Path(file_okay=False, path_type=pathlib.Path))
+@click.option("--no-status", is_flag=True, help="Skip git dirty state, it is the only slow part.")
+@click.option("--json", "as_json", is_flag=True, help="Print metadata as json.")
+def list_addons(paths, no_status, as_json):
+    import dataclasses
+
+    import addon_index
+
+    index = addon_index.get_index()
+    addons = index.get_addons(paths or None, git_status=not no_status)
+    if as_json:
+        print(json.dumps([dataclasses.asdict(addon) for addon in addons], indent=4))
+        return
+
+    for addon in addons:
+        git_state = ""
+        if addon.git_head:
+            git_state = f"{addon.git_branch or 'detached'}@{addon.git_head[:8]}"
+            if addon.git_dirty:
+                git_state += " (dirty)"
+        version = addon.version or "-"
+        if addon.pyproject_version and addon.pyproject_version != addon.version:
+            version += f" (pyproject {addon.pyproject_version})"
+        required = ", ".join(
+            f"{name} {version_range}"
+            for name, version_range in addon.ayon_required_addons.items()
+        )
+        print(
+            f"{pathlib.Path(addon.path).name:<30} {addon.name or '-':<25}"
+            f" {version:<20} {git_state}"
+        )
+        if required:
+            print(f"    requires {required}")
+
+
+@cli.group(help="Runs workspace daemon which serves commands warm.")
+def daemon():
+    pass
+
+
+@daemon.command(name="start", help="Starts the daemon in background.")
+@click.option(
+    "--foreground",
+    is_flag=True,
+    help="Run the daemon in this process and print its log.",
+)
+@click.option(
+    "--poll-interval",
+    type=float,
+    default=5.0,
+    show_default=True,
+    help="Seconds between checks of addon changes when watchdog is not installed.",
+)
+def start_daemon(foreground, poll_interval):
+    import workspace_daemon
+
+    if not workspace_daemon.is_supported():
+        raise click.ClickException("Workspace daemon requires Unix sockets.")
+    status = workspace_daemon.request({"type": "status"})
+    if status is not None:
+        print(f"Workspace daemon {status['pid']} is already running.")
+        return
+
+    if foreground:
+        workspace_daemon.WorkspaceDaemon(cli, poll_interval).serve()
+        return
+
+    workspace_daemon.LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(workspace_daemon.LOG_FILE, "a") as log_file:
+        subprocess.Popen(
+            [
+                sys.executable,
+                __file__,
+                "daemon",
+                "start",
+                "--foreground",
+                "--poll-interval",
+                str(poll_interval),
+            ],
+            cwd=ROOT_PATH,
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+    # Daemon answers after it loaded addons and logged in to server
+    deadline = time.monotonic() + DAEMON_START_TIMEOUT
+    while time.monotonic() < deadline:
+        status = workspace_daemon.request({"type": "status"})
+        if status is not None:
+            print(f"Workspace daemon {status['pid']} started.")
+            return
+        time.sleep(0.1)
+    raise click.ClickException(
+        f"Workspace daemon did not start, see {workspace_daemon.LOG_FILE}"
+    )
+
+
+@daemon.command(name="stop", help="Stops the daemon.")
+def stop_daemon():
+    import workspace_daemon
+
+    response = workspace_daemon.request({"type": "stop"})
+    if response is None:
+        print("Workspace daemon is not running.")
+        return
+    print(f"Workspace daemon {response['stopped']} stopped.")
+
+
+@daemon.command(name="status", help="Shows whether the daemon is running.")
+def daemon_status():
+    import workspace_daemon
+
+    status = workspace_daemon.request({"type": "status"})
+    if status is None:
+        print("Workspace daemon is not running.")
+        return
+    print(
+        f"Workspace daemon {status['pid']} on {status['socket']}\n"
+        f"    uptime {status['uptime']:.0f}s, served {status['commands']}"
+        f" commands, refreshed addons {status['refreshes']} times"
+        f" ({status['watcher']})"
+    )
 
 
 @cli.command(
@@ -219,9 +1103,13 @@ def start_docker():
     subprocess.call("docker compose up -d", shell=True)
 
 
-cli.add_command(create_addon.create_addon_cli)
-cli.add_command(upload_addons.upload_addons_cli)
 cli.add_command(build_releases)
 
 if __name__ == "__main__":
+    import workspace_daemon
+
+    # Runs in process when the daemon is not running
+    exit_code = workspace_daemon.forward(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
     cli()
@@ -19,19 +19,32 @@ if available.
 
 Package contains server side files directly,
 client side code zipped in `private` subfolder.
+
+The package folder is created only with `--skip-zip` or `--keep-sources`,
+otherwise the server zip is written directly from addon sources.
 """
 
 import os
 import sys
 import re
+import json
 import shutil
+import stat
+import hashlib
 import platform
 import argparse
 import logging
 import collections
 import subprocess
+import tempfile
+import struct
 import zipfile
-from typing import Optional, Iterable, Pattern, Union
+import zlib
+import functools
+import importlib.util
+import itertools
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Iterable, Iterator, Pattern, Union
 import time
 
 import semantic_version
@@ -43,6 +56,42 @@ load_dotenv()
 
 import package
 
+
+def _load_workspace_module(module_name: str):
+    """Module from 'scripts' of workspace the addon is in, if there is one.
+
+    Addons are in 'addons' folder of the workspace. Module already imported
+    by workspace, when packaging runs in its process, is reused.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    module_path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "scripts",
+        f"{module_name}.py",
+    )
+    if not os.path.isfile(module_path):
+        return None
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        del sys.modules[module_name]
+        return None
+    return module
+
+
+# Optional stat cache of file hashes, all files are hashed without it
+fingerprint_index = _load_workspace_module("fingerprint_index")
+
+# Used to clone files on copy-on-write filesystems, not available on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 ADDON_NAME: str = package.name
 ADDON_VERSION: str = package.version
 
@@ -81,6 +130,56 @@ IGNORE_FILE_PATTERNS: list[Pattern] = [
 ]
 
 
+# Patterns of frontend directories which are not sources of the build
+IGNORE_FRONTEND_DIR_PATTERNS: list[Pattern] = IGNORE_DIR_PATTERNS + [
+    re.compile(pattern)
+    for pattern in [
+        "^node_modules$",
+        "^dist$",
+    ]
+]
+
+# Client zip is kept in memory up to this size when streaming server package
+CLIENT_ZIP_SPOOL_SIZE: int = 64 * 1024 * 1024
+
+# Extensions of already compressed files which are stored without deflate
+STORED_EXTENSIONS: set[str] = {
+    # Images
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico",
+    # Fonts
+    ".woff", ".woff2",
+    # Archives and packages
+    ".zip", ".whl", ".egg", ".gz", ".tgz", ".bz2", ".xz", ".7z",
+    # Media
+    ".mp3", ".mp4", ".mov", ".webm",
+}
+
+# Deflate level used by '--fast' for quick local development packages
+FAST_COMPRESS_LEVEL: int = 1
+
+# Earliest timestamp which can be stored in zip file
+ZIP_EPOCH_DATE_TIME: tuple = (1980, 1, 1, 0, 0, 0)
+
+# Bigger files are compressed by zipfile directly instead of in memory
+PARALLEL_COMPRESS_MAX_SIZE: int = 32 * 1024 * 1024
+
+# Indexes of file name and extra field lengths in zip local file header
+_FH_FILENAME_LENGTH: int = 10
+_FH_EXTRA_FIELD_LENGTH: int = 11
+
+# Suffix of hidden folder next to synced client code holding its versions
+CLIENT_SYNC_SUFFIX: str = ".sync"
+
+# Linux ioctl cloning file content on copy-on-write filesystems
+FICLONE: int = 0x40049409
+
+# Honor addon '.gitignore' when collecting server and client files
+USE_GITIGNORE: bool = False
+
+# Build cache location relative to addon root, '.cache' is in '.gitignore'
+BUILD_CACHE_DIR: str = os.path.join(".cache", "create_package")
+
+
 class ZipFileLongPaths(zipfile.ZipFile):
     """Allows longer paths in zip files.
 
@@ -102,6 +201,274 @@ class ZipFileLongPaths(zipfile.ZipFile):
 
         return super(ZipFileLongPaths, self)._extract_member(member, tpath, pwd)
 
+    def write_compressed(self, zinfo: zipfile.ZipInfo, data: bytes):
+        """Write member which was already compressed.
+
+        The 'zinfo' must have filled 'CRC', 'file_size', 'compress_size' and
+        'compress_type' matching the 'data'. Mirrors what 'ZipFile.mkdir'
+        does for members without data.
+        """
+
+        zip64 = (
+            zinfo.file_size > zipfile.ZIP64_LIMIT
+            or zinfo.compress_size > zipfile.ZIP64_LIMIT
+        )
+        with self._lock:
+            if self._seekable:
+                self.fp.seek(self.start_dir)
+            zinfo.header_offset = self.fp.tell()
+            self._writecheck(zinfo)
+            self._didModify = True
+            self.fp.write(zinfo.FileHeader(zip64))
+            self.fp.write(data)
+            self.filelist.append(zinfo)
+            self.NameToInfo[zinfo.filename] = zinfo
+            self.start_dir = self.fp.tell()
+
+
+class ZipCompressor:
+    """Writes files to zip archives deflating them on a thread pool.
+
+    Members are compressed in parallel but written to the archive in the
+    order they were passed, so the result does not depend on scheduling.
+    Output is a regular zip file. Files with extension in
+    'stored_extensions' are already compressed and are stored as they are.
+
+    With 'date_time' the archives are reproducible. Members are sorted by
+    name and have the same timestamp and normalized permissions, so the same
+    sources always produce byte identical zip files.
+
+    Bytes and time spent are collected per file extension, see 'log_report'.
+
+    Args:
+        jobs (Optional[int]): Number of compression threads. Defaults to
+            number of CPUs, '1' compresses serially.
+        level (Optional[int]): Deflate level 0-9. Defaults to zlib default.
+        stored_extensions (Optional[set[str]]): Extensions of files which
+            are not deflated. Defaults to 'STORED_EXTENSIONS'.
+        date_time (Optional[tuple]): Timestamp of all members for
+            reproducible archives.
+    """
+
+    def __init__(
+        self,
+        jobs: Optional[int] = None,
+        level: Optional[int] = None,
+        stored_extensions: Optional[set[str]] = None,
+        date_time: Optional[tuple] = None,
+    ):
+        if stored_extensions is None:
+            stored_extensions = STORED_EXTENSIONS
+        if level is None:
+            level = zlib.Z_DEFAULT_COMPRESSION
+        self.jobs: int = jobs or os.cpu_count() or 1
+        self.level: int = level
+        self.stored_extensions: set[str] = {
+            ext.lower() for ext in stored_extensions
+        }
+        self.date_time: Optional[tuple] = date_time
+        # Extension -> [files, file bytes, compressed bytes, seconds]
+        self.stats: dict[str, list] = collections.defaultdict(
+            lambda: [0, 0, 0, 0.0]
+        )
+        # Members copied compressed from other archives
+        self.reused: int = 0
+
+    @property
+    def settings_key(self) -> str:
+        """Settings affecting content of created archives."""
+        return "{}:{}:{}".format(
+            self.level,
+            ",".join(sorted(self.stored_extensions)),
+            self.date_time,
+        )
+
+    def get_compress_type(self, arcname: str) -> int:
+        """Compression method used for member of given name."""
+        ext = os.path.splitext(arcname)[1].lower()
+        if ext in self.stored_extensions:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def new_zinfo(
+        self,
+        arcname: str,
+        src_path: Optional[str] = None,
+        src_stat: Optional[os.stat_result] = None,
+    ) -> zipfile.ZipInfo:
+        """Create member info with compression and reproducible metadata.
+
+        Args:
+            arcname (str): Path of member in archive.
+            src_path (Optional[str]): Source file of member.
+            src_stat (Optional[os.stat_result]): Stat of source file if
+                already known.
+
+        Returns:
+            zipfile.ZipInfo: Member info, sizes are filled only when
+                'src_path' is passed.
+        """
+        if src_path:
+            if src_stat is None:
+                src_stat = os.stat(src_path)
+            # Same as 'ZipInfo.from_file' without additional stat call
+            date_time = time.localtime(src_stat.st_mtime)[:6]
+            date_time = min(
+                max(date_time, ZIP_EPOCH_DATE_TIME), (2107, 12, 31, 23, 59, 59)
+            )
+            zinfo = zipfile.ZipInfo(arcname, date_time)
+            zinfo.external_attr = (src_stat.st_mode & 0xFFFF) << 16
+            zinfo.file_size = src_stat.st_size
+        else:
+            zinfo = zipfile.ZipInfo(arcname, time.localtime()[:6])
+            zinfo.external_attr = 0o644 << 16
+        zinfo.compress_type = self.get_compress_type(arcname)
+        zinfo._compresslevel = self.level
+
+        if self.date_time:
+            mode = 0o644
+            if (zinfo.external_attr >> 16) & 0o111:
+                mode = 0o755
+            zinfo.date_time = self.date_time
+            zinfo.create_system = 3
+            zinfo.external_attr = (stat.S_IFREG | mode) << 16
+        return zinfo
+
+    def write_files(
+        self,
+        zipf: ZipFileLongPaths,
+        mapping: Iterable[tuple],
+        reuse: Optional[Callable[[zipfile.ZipInfo], Optional[tuple]]] = None,
+    ):
+        """Write files to zip file.
+
+        Args:
+            zipf (ZipFileLongPaths): Zip file opened for writing.
+            mapping (Iterable[tuple]): Source paths with their paths in
+                archive and optionally their stat, as yielded by
+                'iter_files_in_subdir'.
+            reuse (Optional[Callable[[zipfile.ZipInfo], Optional[tuple]]]):
+                Returns archive and its member with the same content as
+                the new member, which is then copied without compression.
+        """
+
+        if self.date_time:
+            mapping = sorted(
+                mapping, key=lambda item: item[1].replace(os.path.sep, "/")
+            )
+
+        if self.jobs < 2:
+            for src_path, arcname, *src_stat in mapping:
+                zinfo = self.new_zinfo(arcname, src_path, *src_stat)
+                future = self._reuse(zinfo, reuse)
+                self._write_pending(zipf, src_path, zinfo, future)
+            return
+
+        # Limit members held in memory to a few per thread
+        pending: collections.deque = collections.deque()
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for src_path, arcname, *src_stat in mapping:
+                zinfo = self.new_zinfo(arcname, src_path, *src_stat)
+                future = self._reuse(zinfo, reuse)
+                if (
+                    future is None
+                    and zinfo.file_size <= PARALLEL_COMPRESS_MAX_SIZE
+                ):
+                    future = executor.submit(self._compress, src_path, zinfo)
+                pending.append((src_path, zinfo, future))
+                while len(pending) > self.jobs * 2:
+                    self._write_pending(zipf, *pending.popleft())
+
+            while pending:
+                self._write_pending(zipf, *pending.popleft())
+
+    def log_report(self, log: logging.Logger):
+        """Log bytes saved and time spent per file extension."""
+        if not self.stats:
+            return
+        log.info("Compression per file extension:")
+        for ext, (count, size, compress_size, seconds) in sorted(
+            self.stats.items(), key=lambda item: item[1][3], reverse=True
+        ):
+            saved = size - compress_size
+            ratio = saved / size * 100 if size else 0.0
+            log.info(
+                f"    {ext or '<none>':<10} {count:>6} files"
+                f" {size / 1024:>10.0f} KiB saved {saved / 1024:>10.0f} KiB"
+                f" ({ratio:5.1f}%) in {seconds:6.2f}s"
+            )
+
+    def _reuse(
+        self,
+        zinfo: zipfile.ZipInfo,
+        reuse: Optional[Callable[[zipfile.ZipInfo], Optional[tuple]]],
+    ) -> Optional[Future]:
+        """Read compressed data of member which can be reused.
+
+        Returns:
+            Optional[Future]: Resolved future with the same result as
+                '_compress', None if member must be compressed.
+        """
+        if reuse is None:
+            return None
+        reusable = reuse(zinfo)
+        if reusable is None:
+            return None
+        src_zipf, src_zinfo = reusable
+        if (
+            src_zinfo.compress_type != zinfo.compress_type
+            or src_zinfo.file_size != zinfo.file_size
+            or src_zinfo.flag_bits & 0x1
+        ):
+            return None
+
+        start = time.perf_counter()
+        # Local header may differ from central directory in extra field
+        src_zipf.fp.seek(src_zinfo.header_offset)
+        header = struct.unpack(
+            zipfile.structFileHeader, src_zipf.fp.read(zipfile.sizeFileHeader)
+        )
+        src_zipf.fp.seek(
+            header[_FH_FILENAME_LENGTH] + header[_FH_EXTRA_FIELD_LENGTH], 1
+        )
+        compressed = src_zipf.fp.read(src_zinfo.compress_size)
+        zinfo.CRC = src_zinfo.CRC
+        zinfo.compress_size = src_zinfo.compress_size
+        self.reused += 1
+        future = Future()
+        future.set_result((zinfo, compressed, time.perf_counter() - start))
+        return future
+
+    def _compress(self, src_path: str, zinfo: zipfile.ZipInfo):
+        start = time.perf_counter()
+        with open(src_path, "rb") as stream:
+            data = stream.read()
+        compressed = data
+        if zinfo.compress_type == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+            compressed = compressor.compress(data) + compressor.flush()
+        zinfo.file_size = len(data)
+        zinfo.CRC = zlib.crc32(data)
+        zinfo.compress_size = len(compressed)
+        return zinfo, compressed, time.perf_counter() - start
+
+    def _write_pending(self, zipf, src_path, zinfo, future):
+        if future is None:
+            start = time.perf_counter()
+            with open(src_path, "rb") as src_stream:
+                with zipf.open(zinfo, "w") as dst_stream:
+                    shutil.copyfileobj(src_stream, dst_stream, 1024 * 1024)
+            seconds = time.perf_counter() - start
+        else:
+            zinfo, compressed, seconds = future.result()
+            zipf.write_compressed(zinfo, compressed)
+
+        stats = self.stats[os.path.splitext(zinfo.filename)[1].lower()]
+        stats[0] += 1
+        stats[1] += zinfo.file_size
+        stats[2] += zinfo.compress_size
+        stats[3] += seconds
+
 
 def safe_copy_file(src_path: str, dst_path: str):
     """Copy file and make sure destination directory exists.
@@ -125,20 +492,277 @@ def safe_copy_file(src_path: str, dst_path: str):
     shutil.copy2(src_path, dst_path)
 
 
-def _value_match_regexes(value: str, regexes: Iterable[Pattern]) -> bool:
-    return any(regex.search(value) for regex in regexes)
+def _hash_file(path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
 
 
-def find_files_in_subdir(
+class BuildCache:
+    """Fingerprints and outputs of package stages from previous runs.
+
+    Every stage (server, frontend, client and the whole package) is keyed by
+    a hash of its inputs. When the fingerprint of a stage matches the one
+    stored by a previous run and its output still exists, the stage can be
+    skipped and the output reused.
+
+    When 'fingerprint_index' module is available, files are hashed only if
+    their stat changed since previous run.
+
+    Args:
+        current_dir (str): Directory path of addon source.
+    """
+
+    def __init__(self, current_dir: str):
+        self.cache_dir: str = os.path.join(current_dir, BUILD_CACHE_DIR)
+        self.fingerprints: dict[str, str] = {}
+        # Stage -> archive path -> hash of source file
+        self.file_hashes: dict[str, dict[str, str]] = {}
+        self.file_index = None
+        if fingerprint_index is not None:
+            # Shared index stays in memory when packaging runs in process
+            self.file_index = fingerprint_index.get_index(current_dir)
+        self._manifest_path: str = os.path.join(
+            self.cache_dir, "manifest.json"
+        )
+        self._manifest: dict[str, dict] = {}
+        if os.path.exists(self._manifest_path):
+            try:
+                with open(self._manifest_path, "r") as stream:
+                    self._manifest = json.load(stream)
+            except ValueError:
+                self._manifest = {}
+
+    def get_path(self, filename: str) -> str:
+        """Path to a cached output file."""
+        return os.path.join(self.cache_dir, filename)
+
+    def add_fingerprint(
+        self,
+        stage: str,
+        mapping: Iterable[tuple],
+        *extra: str,
+    ) -> str:
+        """Calculate and remember fingerprint of stage inputs.
+
+        Args:
+            stage (str): Name of the stage.
+            mapping (Iterable[tuple]): Source paths with their destination
+                sub paths, optionally followed by their stat.
+            *extra (str): Additional values affecting the stage output.
+
+        Returns:
+            str: Fingerprint of the stage.
+        """
+        digest = hashlib.sha256()
+        file_hashes: dict[str, str] = {}
+        for value in extra:
+            digest.update(f"{value}\0".encode("utf-8"))
+        for src_path, sub_path, *src_stat in sorted(
+            mapping, key=lambda item: item[1]
+        ):
+            sub_path = sub_path.replace(os.path.sep, "/")
+            if self.file_index is not None:
+                file_hash = self.file_index.hash_file(src_path, *src_stat)
+            else:
+                file_hash = _hash_file(src_path)
+            file_hashes[sub_path] = file_hash
+            digest.update(f"{sub_path}\0{file_hash}\n".encode())
+        fingerprint = digest.hexdigest()
+        self.fingerprints[stage] = fingerprint
+        self.file_hashes[stage] = file_hashes
+        return fingerprint
+
+    def get_previous(self, stage: str, output_path: str) -> Optional[dict]:
+        """Entry stored by previous run if its output was not modified.
+
+        Returns:
+            Optional[dict]: Fingerprint, output and values passed to
+                'store' by previous run.
+        """
+        entry = self._manifest.get(stage)
+        if not entry or entry["output"] != os.path.abspath(output_path):
+            return None
+        if os.path.isdir(output_path):
+            return entry
+        if not os.path.isfile(output_path):
+            return None
+        stat = os.stat(output_path)
+        if entry["stat"] != [stat.st_size, stat.st_mtime_ns]:
+            return None
+        return entry
+
+    def is_fresh(self, stage: str, output_path: str) -> bool:
+        """Output of the stage was created from the same inputs."""
+        fingerprint = self.fingerprints.get(stage)
+        entry = self.get_previous(stage, output_path)
+        if not fingerprint or not entry:
+            return False
+        return entry["fingerprint"] == fingerprint
+
+    def store(self, stage: str, output_path: str, **extra):
+        """Store current fingerprint of the stage and its output.
+
+        Args:
+            stage (str): Name of the stage.
+            output_path (str): Output file or directory of the stage.
+            **extra: Json serializable values for next run.
+        """
+        stat = None
+        if os.path.isfile(output_path):
+            output_stat = os.stat(output_path)
+            stat = [output_stat.st_size, output_stat.st_mtime_ns]
+        self._manifest[stage] = {
+            **extra,
+            "fingerprint": self.fingerprints[stage],
+            "output": os.path.abspath(output_path),
+            "stat": stat,
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._manifest_path}.tmp"
+        with open(tmp_path, "w") as stream:
+            json.dump(self._manifest, stream, indent=4)
+        os.replace(tmp_path, self._manifest_path)
+
+
+@functools.lru_cache(maxsize=None)
+def _combine_patterns(patterns: tuple) -> Optional[Pattern]:
+    """Combine regexes to one so each name is matched only once."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern.pattern})" for pattern in patterns))
+
+
+def _gitignore_pattern_to_regex(pattern: str) -> str:
+    """Translate '.gitignore' glob to regex matching relative posix paths."""
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    regex = ""
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            regex += "(?:.*/)?"
+            index += 3
+            continue
+        if pattern.startswith("**", index):
+            regex += ".*"
+            index += 2
+            continue
+
+        char = pattern[index]
+        end = pattern.find("]", index + 1) if char == "[" else -1
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif end != -1:
+            char_class = pattern[index + 1:end]
+            if char_class.startswith("!"):
+                char_class = "^" + char_class[1:]
+            regex += f"[{char_class}]"
+            index = end
+        else:
+            regex += re.escape(char)
+        index += 1
+
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return regex + "$"
+
+
+class GitIgnore:
+    """Matcher of paths against rules from '.gitignore' file.
+
+    Supports the common subset of gitignore syntax: globs, '**', anchored
+    and directory only patterns, and '!' negation. Only the file in addon
+    root is used, nested '.gitignore' files are not.
+
+    Args:
+        root (str): Directory with '.gitignore' file.
+        lines (Iterable[str]): Lines of '.gitignore' file.
+    """
+
+    def __init__(self, root: str, lines: Iterable[str]):
+        self.root: str = root
+        self._rules: list[tuple[Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            if line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if line:
+                self._rules.append(
+                    (re.compile(_gitignore_pattern_to_regex(line)), negate, dir_only)
+                )
+
+        # Without negations all rules are matched with one regex
+        self._has_negation: bool = any(rule[1] for rule in self._rules)
+        self._file_regex: Optional[Pattern] = _combine_patterns(
+            tuple(rule[0] for rule in self._rules if not rule[2])
+        )
+        self._dir_regex: Optional[Pattern] = _combine_patterns(
+            tuple(rule[0] for rule in self._rules)
+        )
+
+    @classmethod
+    def from_dir(cls, root: str) -> Optional["GitIgnore"]:
+        """Load '.gitignore' from directory if there is one."""
+        path = os.path.join(root, ".gitignore")
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r", encoding="utf-8") as stream:
+            return cls(root, stream.read().splitlines())
+
+    def match(self, rel_path: str, is_dir: bool) -> bool:
+        """Path relative to 'root' with '/' separators is ignored."""
+        if not self._has_negation:
+            regex = self._dir_regex if is_dir else self._file_regex
+            return regex is not None and regex.match(rel_path) is not None
+
+        ignored = False
+        for regex, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                ignored = not negate
+        return ignored
+
+
+def _get_gitignore(current_dir: str) -> Optional[GitIgnore]:
+    if not USE_GITIGNORE:
+        return None
+    return _load_gitignore(current_dir)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_gitignore(current_dir: str) -> Optional[GitIgnore]:
+    return GitIgnore.from_dir(current_dir)
+
+
+def iter_files_in_subdir(
     src_path: str,
     ignore_file_patterns: Optional[list[Pattern]] = None,
     ignore_dir_patterns: Optional[list[Pattern]] = None,
-) -> list[tuple[str, str]]:
-    """Find all files to copy in subdirectories of given path.
+    gitignore: Optional[GitIgnore] = None,
+    arc_prefix: str = "",
+) -> Iterator[tuple[str, str, os.stat_result]]:
+    """Iterate over all files to copy in subdirectories of given path.
 
     All files that match any of the patterns in 'ignore_file_patterns' will
         be skipped and any directories that match any of the patterns in
-        'ignore_dir_patterns' will be skipped with all subfiles.
+        'ignore_dir_patterns' will be skipped with all subfiles. The
+        patterns are combined into one regex per kind.
+
+    Uses 'os.scandir' so file type checks do not need additional stat calls
+        and the stat of each file is yielded for consumers to reuse.
 
     Args:
         src_path (str): Path to directory to search in.
@@ -146,10 +770,13 @@ def find_files_in_subdir(
             to match files to ignore.
         ignore_dir_patterns (Optional[list[Pattern]]): List of regexes
             to match directories to ignore.
+        gitignore (Optional[GitIgnore]): Also skip paths ignored by
+            '.gitignore' rules.
+        arc_prefix (str): Prefix added to yielded relative paths.
 
-    Returns:
-        list[tuple[str, str]]: List of tuples with path to file and parent
-            directories relative to 'src_path'.
+    Yields:
+        tuple[str, str, os.stat_result]: Path to file, path relative to
+            'src_path' with 'arc_prefix' and stat of the file.
     """
 
     if ignore_file_patterns is None:
@@ -157,28 +784,76 @@ def find_files_in_subdir(
 
     if ignore_dir_patterns is None:
         ignore_dir_patterns = IGNORE_DIR_PATTERNS
-    output: list[tuple[str, str]] = []
-
-    hierarchy_queue: collections.deque = collections.deque()
-    hierarchy_queue.append((src_path, []))
-    while hierarchy_queue:
-        item: tuple[str, str] = hierarchy_queue.popleft()
-        dirpath, parents = item
-        for name in os.listdir(dirpath):
-            path: str = os.path.join(dirpath, name)
-            if os.path.isfile(path):
-                if not _value_match_regexes(name, ignore_file_patterns):
-                    items: list[str] = list(parents)
-                    items.append(name)
-                    output.append((path, os.path.sep.join(items)))
-                continue
 
-            if not _value_match_regexes(name, ignore_dir_patterns):
-                items: list[str] = list(parents)
-                items.append(name)
-                hierarchy_queue.append((path, items))
+    file_regex = _combine_patterns(tuple(ignore_file_patterns))
+    dir_regex = _combine_patterns(tuple(ignore_dir_patterns))
+
+    # Prefix of paths relative to '.gitignore' location
+    gitignore_prefix = None
+    if gitignore is not None:
+        gitignore_prefix = os.path.relpath(src_path, gitignore.root)
+        gitignore_prefix = gitignore_prefix.replace(os.path.sep, "/") + "/"
+        if gitignore_prefix == "./":
+            gitignore_prefix = ""
+
+    stack: list[tuple[str, str]] = [(src_path, "")]
+    while stack:
+        dirpath, parent = stack.pop()
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                name = entry.name
+                sub_path = parent + name
+                if entry.is_file():
+                    if file_regex is not None and file_regex.search(name):
+                        continue
+                    is_dir = False
+                elif entry.is_dir():
+                    if dir_regex is not None and dir_regex.search(name):
+                        continue
+                    is_dir = True
+                else:
+                    continue
+
+                if gitignore_prefix is not None:
+                    rel_path = gitignore_prefix + sub_path
+                    if os.path.sep != "/":
+                        rel_path = rel_path.replace(os.path.sep, "/")
+                    if gitignore.match(rel_path, is_dir):
+                        continue
+
+                if is_dir:
+                    stack.append((entry.path, sub_path + os.path.sep))
+                else:
+                    yield entry.path, arc_prefix + sub_path, entry.stat()
+
+
+def find_files_in_subdir(
+    src_path: str,
+    ignore_file_patterns: Optional[list[Pattern]] = None,
+    ignore_dir_patterns: Optional[list[Pattern]] = None,
+) -> list[tuple[str, str]]:
+    """Find all files to copy in subdirectories of given path.
+
+    Kept for backwards compatibility, see 'iter_files_in_subdir'.
 
-    return output
+    Args:
+        src_path (str): Path to directory to search in.
+        ignore_file_patterns (Optional[list[Pattern]]): List of regexes
+            to match files to ignore.
+        ignore_dir_patterns (Optional[list[Pattern]]): List of regexes
+            to match directories to ignore.
+
+    Returns:
+        list[tuple[str, str]]: List of tuples with path to file and parent
+            directories relative to 'src_path'.
+    """
+
+    return [
+        (path, sub_path)
+        for path, sub_path, _ in iter_files_in_subdir(
+            src_path, ignore_file_patterns, ignore_dir_patterns
+        )
+    ]
 
 
 def _get_yarn_executable():
@@ -197,6 +872,41 @@ def _get_yarn_executable():
     return None
 
 
+def _iter_server_content(
+    current_dir: str, arc_prefix: str = ""
+) -> Iterator[tuple[str, str, os.stat_result]]:
+    """Server files to copy with paths relative to 'server' directory.
+
+    Args:
+        current_dir (str): addon repo dir
+        arc_prefix (str): Prefix added to relative paths.
+
+    Yields:
+        tuple[str, str, os.stat_result]: Path mappings to copy.
+    """
+
+    gitignore = _get_gitignore(current_dir)
+    server_dirpath: str = os.path.join(current_dir, "server")
+    # Top level entries are not filtered by ignore patterns
+    with os.scandir(server_dirpath) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+
+    for entry in entries:
+        is_dir = entry.is_dir()
+        if gitignore is not None and gitignore.match(
+            f"server/{entry.name}", is_dir
+        ):
+            continue
+        if not is_dir:
+            yield entry.path, arc_prefix + entry.name, entry.stat()
+            continue
+        yield from iter_files_in_subdir(
+            entry.path,
+            gitignore=gitignore,
+            arc_prefix=arc_prefix + entry.name + os.path.sep,
+        )
+
+
 def copy_server_content(addon_output_dir: str, current_dir: str, log: logging.Logger):
     """Copies server side folders to 'addon_package_dir'
 
@@ -208,55 +918,98 @@ def copy_server_content(addon_output_dir: str, current_dir: str, log: logging.Lo
 
     log.info("Copying server content")
 
-    filepaths_to_copy: list[tuple[str, str]] = []
-    server_dirpath: str = os.path.join(current_dir, "server")
+    # Copy files
+    for src_path, dst_path, _ in _iter_server_content(current_dir):
+        safe_copy_file(src_path, os.path.join(addon_output_dir, "server", dst_path))
 
-    for name in os.listdir(server_dirpath):
-        src_dir = os.path.join(server_dirpath, name)
-        if not os.path.isdir(src_dir):
-            filepaths_to_copy.append((src_dir, name))
-            continue
 
-        for item in find_files_in_subdir(src_dir):
-            src_path, dst_subpath = item
-            filepaths_to_copy.append((src_path, os.path.join(name, dst_subpath)))
+def _iter_frontend_sources(
+    frontend_dirpath: str,
+) -> Iterator[tuple[str, str, os.stat_result]]:
+    """Files affecting the frontend build output.
 
-    # Copy files
-    for src_path, dst_path in filepaths_to_copy:
-        safe_copy_file(src_path, os.path.join(addon_output_dir, "server", dst_path))
+    Node projects are fingerprinted by their sources and lockfile, otherwise
+    the prebuilt 'dist' directory is the source.
+    """
+
+    if os.path.exists(os.path.join(frontend_dirpath, "package.json")):
+        return iter_files_in_subdir(
+            frontend_dirpath,
+            ignore_dir_patterns=IGNORE_FRONTEND_DIR_PATTERNS,
+        )
+    return iter_files_in_subdir(os.path.join(frontend_dirpath, "dist"))
 
 
-def copy_frontend_content(addon_output_dir: str, current_dir: str, log: logging.Logger):
-    filepaths_to_copy: list[tuple[str, str]] = []
+def _iter_frontend_content(
+    current_dir: str,
+    log: logging.Logger,
+    build_cache: Optional[BuildCache] = None,
+) -> Iterator[tuple[str, str, os.stat_result]]:
+    """Build frontend if needed and collect files of its 'dist' directory.
+
+    Args:
+        current_dir (str): Directory path of addon source.
+        log (logging.Logger): Logger object.
+        build_cache (Optional[BuildCache]): Skip the build if frontend
+            sources did not change since previous run.
+
+    Returns:
+        Iterator[tuple[str, str, os.stat_result]]: Path mappings to copy.
+            The destination path is relative to addon package root.
+    """
 
     frontend_dirpath: str = os.path.join(current_dir, "frontend")
     if not os.path.exists(frontend_dirpath):
         log.info("Frontend directory was not found. Skipping")
-        return
+        return iter(())
 
     frontend_dist_dirpath: str = os.path.join(frontend_dirpath, "dist")
 
     if os.path.exists(os.path.join(frontend_dirpath, "package.json")):
         # if package.json exists, we assume that frontend is a node project
         # and we need to build it
-        yarn_executable = _get_yarn_executable()
-        if yarn_executable is None:
-            raise RuntimeError("Yarn executable was not found.")
-
-        subprocess.run([yarn_executable, "install"], cwd=frontend_dirpath)
-        subprocess.run([yarn_executable, "build"], cwd=frontend_dirpath)
+        if build_cache and build_cache.is_fresh(
+            "frontend", frontend_dist_dirpath
+        ):
+            log.info("Frontend sources did not change. Skipping build")
+        else:
+            yarn_executable = _get_yarn_executable()
+            if yarn_executable is None:
+                raise RuntimeError("Yarn executable was not found.")
+
+            # Failed build may leave previous 'dist', it must not be cached
+            for command in ("install", "build"):
+                result = subprocess.run(
+                    [yarn_executable, command], cwd=frontend_dirpath
+                )
+                if result.returncode != 0:
+                    raise RuntimeError(
+                        f"Frontend 'yarn {command}' failed"
+                        f" with exit code {result.returncode}."
+                    )
+            if build_cache and "frontend" in build_cache.fingerprints:
+                build_cache.store("frontend", frontend_dist_dirpath)
 
     if not os.path.isdir(frontend_dirpath):
         raise RuntimeError("Frontend dist directory not found.")
 
-    for item in find_files_in_subdir(frontend_dist_dirpath):
-        src_path, dst_subpath = item
-        filepaths_to_copy.append(
-            (src_path, os.path.join("frontend", "dist", dst_subpath))
-        )
+    # Frontend dist is a build output, '.gitignore' usually lists it
+    return iter_files_in_subdir(
+        frontend_dist_dirpath,
+        arc_prefix=os.path.join("frontend", "dist", ""),
+    )
+
+
+def copy_frontend_content(
+    addon_output_dir: str,
+    current_dir: str,
+    log: logging.Logger,
+    build_cache: Optional[BuildCache] = None,
+):
+    filepaths_to_copy = _iter_frontend_content(current_dir, log, build_cache)
 
     # Copy files
-    for src_path, dst_path in filepaths_to_copy:
+    for src_path, dst_path, _ in filepaths_to_copy:
         safe_copy_file(src_path, os.path.join(addon_output_dir, dst_path))
 
 
@@ -281,44 +1034,191 @@ def _update_client_version(current_dir, log):
         log.info("Client does not contain 'version.py' file.")
         return
 
+    content = CLIENT_VERSION_CONTENT.format(ADDON_NAME, ADDON_VERSION)
+    with open(version_file, "r") as stream:
+        if stream.read() == content:
+            return
+
+    # Write only on change so the file is not modified by every run
     with open(version_file, "w") as stream:
-        stream.write(
-            CLIENT_VERSION_CONTENT.format(ADDON_NAME, ADDON_VERSION)
-        )
+        stream.write(content)
     log.info(f"Client 'version.py' updated to '{ADDON_VERSION}'")
 
 
-def _get_client_zip_content(current_dir: str, log: logging.Logger):
-    """
+def _iter_client_zip_content(
+    current_dir: str, log: logging.Logger
+) -> Iterator[tuple[str, str, os.stat_result]]:
+    """Client code files with their paths in client zip.
 
     Args:
         current_dir (str): Directory path of addon source.
         log (logging.Logger): Logger object.
 
     Returns:
-        list[tuple[str, str]]: List of path mappings to copy. The destination
-            path is relative to expected output directory.
+        Iterator[tuple[str, str, os.stat_result]]: Path mappings to copy.
+            The destination path is relative to expected output directory.
     """
 
-
-    log.info("Preparing client code zip")
-
-    output: list[tuple[str, str]] = []
+    log.debug("Collecting client code files")
 
     # Add client code content to zip
     client_code_dir: str = _get_client_code_path(current_dir)
-    for path, sub_path in find_files_in_subdir(client_code_dir):
-        output.append((path, os.path.join(ADDON_CLIENT_DIR, sub_path)))
-    return output
+    return iter_files_in_subdir(
+        client_code_dir,
+        gitignore=_get_gitignore(current_dir),
+        arc_prefix=os.path.join(ADDON_CLIENT_DIR, ""),
+    )
+
+
+def _write_client_zip(
+    target,
+    current_dir: str,
+    log: logging.Logger,
+    compressor: Optional[ZipCompressor] = None,
+):
+    """Zip client code into 'target'.
+
+    Args:
+        target (Union[str, IO[bytes]]): Path to zip file or binary stream.
+        current_dir (str): Directory path of addon source.
+        log (logging.Logger): Logger object.
+        compressor (Optional[ZipCompressor]): Compressor writing the files.
+    """
+
+    mapping = _iter_client_zip_content(current_dir, log)
+    with ZipFileLongPaths(target, "w", zipfile.ZIP_DEFLATED) as zipf:
+        # Add client code content to zip
+        (compressor or ZipCompressor()).write_files(zipf, mapping)
+    log.info("Client zip created")
+
+
+def _update_client_zip(
+    zip_filepath: str,
+    previous_hashes: dict[str, str],
+    current_dir: str,
+    log: logging.Logger,
+    build_cache: BuildCache,
+    compressor: ZipCompressor,
+):
+    """Rewrite client zip copying members of unchanged files compressed.
+
+    Files whose hash is the same as when the previous zip was written are
+    copied from it with their CRC and sizes from its central directory,
+    only new and changed files are compressed. Result is the same as if
+    the zip was written from scratch.
+
+    Args:
+        zip_filepath (str): Path to previous client zip, replaced by the
+            updated one.
+        previous_hashes (dict[str, str]): Hashes of files in previous zip
+            by their archive paths.
+        current_dir (str): Directory path of addon source.
+        log (logging.Logger): Logger object.
+        build_cache (BuildCache): Build cache with current file hashes.
+        compressor (ZipCompressor): Compressor writing the files.
+    """
+
+    current_hashes = build_cache.file_hashes["client"]
+    tmp_filepath = f"{zip_filepath}.tmp"
+    reused_before = compressor.reused
+    with ZipFileLongPaths(zip_filepath, "r") as previous_zipf:
+        previous_members = {
+            zinfo.filename: zinfo for zinfo in previous_zipf.infolist()
+        }
+
+        def reuse(zinfo):
+            file_hash = current_hashes.get(zinfo.filename)
+            if file_hash and previous_hashes.get(zinfo.filename) == file_hash:
+                previous_zinfo = previous_members.get(zinfo.filename)
+                if previous_zinfo is not None:
+                    return previous_zipf, previous_zinfo
+            return None
 
+        try:
+            with ZipFileLongPaths(
+                tmp_filepath, "w", zipfile.ZIP_DEFLATED
+            ) as zipf:
+                compressor.write_files(
+                    zipf, _iter_client_zip_content(current_dir, log), reuse
+                )
+                total = len(zipf.filelist)
+        except BaseException:
+            if os.path.exists(tmp_filepath):
+                os.remove(tmp_filepath)
+            raise
+    os.replace(tmp_filepath, zip_filepath)
+    log.info(
+        f"Client zip updated, {total - (compressor.reused - reused_before)}"
+        f" of {total} files compressed"
+    )
+
+
+def _get_cached_client_zip(
+    current_dir: str,
+    log: logging.Logger,
+    build_cache: Optional[BuildCache],
+    compressor: Optional[ZipCompressor] = None,
+) -> Optional[str]:
+    """Path to client zip in build cache, rebuilt only if code changed.
+
+    Returns:
+        Optional[str]: Path to cached client zip or None if build cache
+            does not track client code.
+    """
+
+    if not build_cache or "client" not in build_cache.fingerprints:
+        return None
+
+    cached_zip_filepath: str = build_cache.get_path("client.zip")
+    if build_cache.is_fresh("client", cached_zip_filepath):
+        log.info("Client code did not change. Reused cached client zip")
+        return cached_zip_filepath
+
+    if compressor is None:
+        compressor = ZipCompressor()
+    previous = build_cache.get_previous("client", cached_zip_filepath)
+    # Compressed data can be reused only with the same settings
+    if (
+        previous
+        and previous.get("files")
+        and previous.get("compression") == compressor.settings_key
+    ):
+        _update_client_zip(
+            cached_zip_filepath,
+            previous["files"],
+            current_dir,
+            log,
+            build_cache,
+            compressor,
+        )
+    else:
+        os.makedirs(build_cache.cache_dir, exist_ok=True)
+        _write_client_zip(cached_zip_filepath, current_dir, log, compressor)
+    build_cache.store(
+        "client",
+        cached_zip_filepath,
+        compression=compressor.settings_key,
+        files=build_cache.file_hashes["client"],
+    )
+    return cached_zip_filepath
 
-def zip_client_side(addon_package_dir: str, current_dir: str, log: logging.Logger):
+
+def zip_client_side(
+    addon_package_dir: str,
+    current_dir: str,
+    log: logging.Logger,
+    build_cache: Optional[BuildCache] = None,
+    compressor: Optional[ZipCompressor] = None,
+):
     """Copy and zip `client` content into 'addon_package_dir'.
 
     Args:
         addon_package_dir (str): Output package directory path.
         current_dir (str): Directory path of addon source.
         log (logging.Logger): Logger object.
+        build_cache (Optional[BuildCache]): Reuse client zip of previous
+            run if client code did not change.
+        compressor (Optional[ZipCompressor]): Compressor writing the files.
     """
 
     if not ADDON_CLIENT_DIR:
@@ -338,22 +1238,26 @@ def zip_client_side(addon_package_dir: str, current_dir: str, log: logging.Logge
         os.makedirs(private_dir)
 
     _update_client_version(current_dir, log)
-    mapping = _get_client_zip_content(current_dir, log)
-
     zip_filepath: str = os.path.join(os.path.join(private_dir, "client.zip"))
-    with ZipFileLongPaths(zip_filepath, "w", zipfile.ZIP_DEFLATED) as zipf:
-        # Add client code content to zip
-        for path, sub_path in mapping:
-            zipf.write(path, sub_path)
-
-    log.info("Client zip created")
+    cached_zip_filepath = _get_cached_client_zip(
+        current_dir, log, build_cache, compressor
+    )
+    if cached_zip_filepath:
+        shutil.copy2(cached_zip_filepath, zip_filepath)
+    else:
+        _write_client_zip(zip_filepath, current_dir, log, compressor)
 
     pyproject_path = os.path.join(current_dir, "client", "pyproject.toml")
     if os.path.exists(pyproject_path):
         shutil.copy(pyproject_path, private_dir)
 
 
-def create_server_package(output_dir: str, addon_output_dir: str, log: logging.Logger):
+def create_server_package(
+    output_dir: str,
+    addon_output_dir: str,
+    log: logging.Logger,
+    compressor: Optional[ZipCompressor] = None,
+):
     """Create server package zip file.
 
     The zip file can be installed to a server using UI or rest api endpoints.
@@ -362,29 +1266,195 @@ def create_server_package(output_dir: str, addon_output_dir: str, log: logging.L
         output_dir (str): Directory path to output zip file.
         addon_output_dir (str): Directory path to addon output directory.
         log (logging.Logger): Logger object.
+        compressor (Optional[ZipCompressor]): Compressor writing the files.
     """
 
     log.info("Creating server package")
     output_path = os.path.join(output_dir, f"{ADDON_NAME}-{ADDON_VERSION}.zip")
 
+    mapping: list[tuple[str, str]] = []
+    # Move addon content to zip into 'addon' directory
+    addon_output_dir_offset = len(addon_output_dir) + 1
+    for root, _, filenames in os.walk(addon_output_dir):
+        if not filenames:
+            continue
+
+        dst_root = None
+        if root != addon_output_dir:
+            dst_root = root[addon_output_dir_offset:]
+        for filename in filenames:
+            src_path = os.path.join(root, filename)
+            dst_path = filename
+            if dst_root:
+                dst_path = os.path.join(dst_root, dst_path)
+            mapping.append((src_path, dst_path))
+
     with ZipFileLongPaths(output_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-        # Move addon content to zip into 'addon' directory
-        addon_output_dir_offset = len(addon_output_dir) + 1
-        for root, _, filenames in os.walk(addon_output_dir):
-            if not filenames:
-                continue
+        (compressor or ZipCompressor()).write_files(zipf, mapping)
+
+    log.info(f"Output package can be found: {output_path}")
+
+
+def _write_client_side(
+    zipf: zipfile.ZipFile,
+    current_dir: str,
+    log: logging.Logger,
+    build_cache: Optional[BuildCache] = None,
+    compressor: Optional[ZipCompressor] = None,
+):
+    """Write client zip and client pyproject into 'private' of server zip.
+
+    The client zip is taken from build cache or built in a spooled
+    temporary file, it never needs a staging directory.
+    """
+
+    if not ADDON_CLIENT_DIR:
+        log.info("Client directory was not defined. Skipping")
+        return
+
+    client_code_dir: str = _get_client_code_path(current_dir)
+    if not os.path.isdir(client_code_dir):
+        raise RuntimeError(
+            f"Client directory was not found '{client_code_dir}'."
+        )
+
+    log.info("Preparing client code zip")
+    if compressor is None:
+        compressor = ZipCompressor()
+    _update_client_version(current_dir, log)
+    client_zip_arcname: str = os.path.join("private", "client.zip")
+    cached_zip_filepath = _get_cached_client_zip(
+        current_dir, log, build_cache, compressor
+    )
+    if cached_zip_filepath:
+        compressor.write_files(
+            zipf, [(cached_zip_filepath, client_zip_arcname)]
+        )
+    else:
+        with tempfile.SpooledTemporaryFile(
+            max_size=CLIENT_ZIP_SPOOL_SIZE
+        ) as client_stream:
+            _write_client_zip(client_stream, current_dir, log, compressor)
+            zip_info = compressor.new_zinfo(client_zip_arcname)
+            # Size is needed by zipfile to decide if zip64 is required
+            zip_info.file_size = client_stream.tell()
+            client_stream.seek(0)
+            with zipf.open(zip_info, "w") as dst_stream:
+                shutil.copyfileobj(client_stream, dst_stream)
+
+    pyproject_path = os.path.join(current_dir, "client", "pyproject.toml")
+    if os.path.exists(pyproject_path):
+        compressor.write_files(
+            zipf, [(pyproject_path, os.path.join("private", "pyproject.toml"))]
+        )
+
+
+def write_server_package(
+    output_dir: str,
+    current_dir: str,
+    log: logging.Logger,
+    build_cache: Optional[BuildCache] = None,
+    compressor: Optional[ZipCompressor] = None,
+) -> str:
+    """Stream addon content directly into server package zip file.
+
+    Unlike 'create_server_package' the content is not copied to a staging
+    directory first. The zip is written next to the output path and renamed
+    when finished, so a failed run does not leave a broken package.
+
+    Args:
+        output_dir (str): Directory path to output zip file.
+        current_dir (str): Directory path of addon source.
+        log (logging.Logger): Logger object.
+        build_cache (Optional[BuildCache]): Build cache of previous runs.
+        compressor (Optional[ZipCompressor]): Compressor writing the files.
+
+    Returns:
+        str: Path to created zip file.
+    """
+
+    if compressor is None:
+        compressor = ZipCompressor()
 
-            dst_root = None
-            if root != addon_output_dir:
-                dst_root = root[addon_output_dir_offset:]
-            for filename in filenames:
-                src_path = os.path.join(root, filename)
-                dst_path = filename
-                if dst_root:
-                    dst_path = os.path.join(dst_root, dst_path)
-                zipf.write(src_path, dst_path)
+    log.info("Creating server package")
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, f"{ADDON_NAME}-{ADDON_VERSION}.zip")
+    tmp_output_path = f"{output_path}.tmp"
+
+    try:
+        with ZipFileLongPaths(tmp_output_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            compressor.write_files(
+                zipf, [(os.path.join(current_dir, "package.py"), "package.py")]
+            )
+
+            log.info("Copying server content")
+            compressor.write_files(
+                zipf,
+                _iter_server_content(current_dir, os.path.join("server", "")),
+            )
+            compressor.write_files(
+                zipf, _iter_frontend_content(current_dir, log, build_cache)
+            )
+
+            _write_client_side(zipf, current_dir, log, build_cache, compressor)
+        os.replace(tmp_output_path, output_path)
+    finally:
+        if os.path.exists(tmp_output_path):
+            os.remove(tmp_output_path)
 
     log.info(f"Output package can be found: {output_path}")
+    return output_path
+
+
+def write_package_manifest(package_zip: str, log: logging.Logger) -> str:
+    """Write content digest manifest next to server package zip file.
+
+    The manifest contains sha256 of the zip file and size with crc of each
+    member, so tools can key caches and uploads by package content.
+
+    Args:
+        package_zip (str): Path to server package zip file.
+        log (logging.Logger): Logger object.
+
+    Returns:
+        str: Path to manifest file.
+    """
+
+    with ZipFileLongPaths(package_zip, "r") as zipf:
+        members = {
+            zinfo.filename: {
+                "size": zinfo.file_size,
+                "crc32": f"{zinfo.CRC:08x}",
+            }
+            for zinfo in zipf.infolist()
+        }
+
+    manifest = {
+        "name": ADDON_NAME,
+        "version": ADDON_VERSION,
+        "package": os.path.basename(package_zip),
+        "sha256": _hash_file(package_zip),
+        "size": os.path.getsize(package_zip),
+        "members": members,
+    }
+    manifest_path = f"{os.path.splitext(package_zip)[0]}.manifest.json"
+    with open(manifest_path, "w") as stream:
+        json.dump(manifest, stream, indent=4, sort_keys=True)
+    log.info(f"Package digest {manifest['sha256']} written to {manifest_path}")
+    return manifest_path
+
+
+def get_reproducible_date_time() -> tuple:
+    """Timestamp of members in reproducible archives.
+
+    Uses 'SOURCE_DATE_EPOCH' environment variable if set, otherwise the
+    earliest date supported by zip format.
+    """
+
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if not epoch:
+        return ZIP_EPOCH_DATE_TIME
+    return max(ZIP_EPOCH_DATE_TIME, tuple(time.gmtime(int(epoch))[:6]))
 
 
 def copy_client_code(current_dir: str, output_dir: str, log: logging.Logger):
@@ -403,20 +1473,209 @@ def copy_client_code(current_dir: str, output_dir: str, log: logging.Logger):
         )
 
     full_output_dir = os.path.join(output_dir, ADDON_CLIENT_DIR)
-    if os.path.exists(full_output_dir):
+    if os.path.islink(full_output_dir):
+        # Created by 'sync_client_code'
+        os.unlink(full_output_dir)
+        shutil.rmtree(_get_client_sync_dir(output_dir), ignore_errors=True)
+    elif os.path.exists(full_output_dir):
         shutil.rmtree(full_output_dir)
 
     if os.path.exists(full_output_dir):
         raise RuntimeError(f"Failed to remove target folder '{full_output_dir}'")
 
     os.makedirs(output_dir, exist_ok=True)
-    _update_client_version(client_code_dir, log)
-    mapping = _get_client_zip_content(current_dir, log)
-    for src_path, dst_path in mapping:
+    _update_client_version(current_dir, log)
+    mapping = _iter_client_zip_content(current_dir, log)
+    for src_path, dst_path, _ in mapping:
         full_dst_path = os.path.join(output_dir, dst_path)
         os.makedirs(os.path.dirname(full_dst_path), exist_ok=True)
         shutil.copy2(src_path, full_dst_path)
 
+
+def _clone_file(src_path: str, dst_path: str):
+    """Copy file content with the cheapest method the platform offers.
+
+    Tries copy-on-write clone (reflink) first, then 'os.copy_file_range'
+        which copies inside the kernel. 'shutil.copyfile' is the fallback,
+        it uses 'sendfile' on Linux and 'fcopyfile' on macOS.
+
+    Args:
+        src_path (str): File path that will be copied.
+        dst_path (str): Path to destination file.
+    """
+
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if fcntl is not None or copy_file_range is not None:
+        with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            if fcntl is not None:
+                try:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                    return
+                except OSError:
+                    pass
+
+            if copy_file_range is not None:
+                size = os.fstat(src.fileno()).st_size
+                copied = 0
+                try:
+                    while copied < size:
+                        count = copy_file_range(
+                            src.fileno(), dst.fileno(), size - copied
+                        )
+                        if count == 0:
+                            break
+                        copied += count
+                except OSError:
+                    pass
+                if copied == size:
+                    return
+
+    shutil.copyfile(src_path, dst_path)
+
+
+def _get_client_sync_dir(output_dir: str) -> str:
+    return os.path.join(output_dir, f".{ADDON_CLIENT_DIR}{CLIENT_SYNC_SUFFIX}")
+
+
+def _swap_client_dir(target_dir: str, version_dir: str, trash_dir: str):
+    """Point client folder in output directory to new version.
+
+    Client folder is a relative symlink replaced with 'os.replace', which
+        is atomic. Where symlinks cannot be created the new version is
+        renamed in place of the previous one.
+
+    Args:
+        target_dir (str): Client folder in output directory.
+        version_dir (str): Folder with new version of client code.
+        trash_dir (str): Where previous client folder is moved if it is
+            not a symlink.
+    """
+
+    tmp_link = f"{target_dir}.{os.getpid()}.tmp"
+    try:
+        os.symlink(
+            os.path.relpath(version_dir, os.path.dirname(target_dir)),
+            tmp_link,
+            target_is_directory=True,
+        )
+    except OSError:
+        tmp_link = None
+
+    # Directory cannot be replaced, this happens only once when output was
+    #   created by copy
+    if os.path.isdir(target_dir) and not os.path.islink(target_dir):
+        os.rename(target_dir, trash_dir)
+    elif tmp_link is None and os.path.lexists(target_dir):
+        os.unlink(target_dir)
+
+    if tmp_link is None:
+        os.rename(version_dir, target_dir)
+    else:
+        os.replace(tmp_link, target_dir)
+
+
+def sync_client_code(
+    current_dir: str, output_dir: str, log: logging.Logger
+) -> bool:
+    """Mirror client code to output directory.
+
+    Each sync creates new version of client code next to the client folder
+        and swaps the client folder to it at once, so processes loading
+        the client code never see partially updated tree. Files with the
+        same size and mtime as in the previous version are hardlinked from
+        it, the others are cloned from sources. Previous version is removed
+        after the swap, which also removes files deleted in sources.
+
+    Args:
+        current_dir (str): Directory path of addon source.
+        output_dir (str): Directory path to output client code.
+        log (logging.Logger): Logger object.
+
+    Returns:
+        bool: Client code in output directory changed.
+    """
+
+    client_code_dir: str = _get_client_code_path(current_dir)
+    if not os.path.isdir(client_code_dir):
+        raise RuntimeError(
+            f"Client directory '{client_code_dir}' was not found."
+        )
+
+    _update_client_version(current_dir, log)
+    target_dir = os.path.join(output_dir, ADDON_CLIENT_DIR)
+    previous_files = {}
+    if os.path.isdir(target_dir):
+        # Default ignore patterns skip '__pycache__' created by the launcher
+        previous_files = {
+            rel_path: (path, file_stat)
+            for path, rel_path, file_stat in iter_files_in_subdir(target_dir)
+        }
+
+    arc_prefix = os.path.join(ADDON_CLIENT_DIR, "")
+    mapping = []
+    changed = 0
+    for src_path, dst_path, src_stat in _iter_client_zip_content(
+        current_dir, log
+    ):
+        rel_path = dst_path[len(arc_prefix):]
+        previous_path = None
+        previous = previous_files.pop(rel_path, None)
+        if (
+            previous is not None
+            and previous[1].st_size == src_stat.st_size
+            and previous[1].st_mtime_ns == src_stat.st_mtime_ns
+        ):
+            previous_path = previous[0]
+        else:
+            changed += 1
+        mapping.append((src_path, rel_path, previous_path))
+
+    removed = len(previous_files)
+    if not changed and not removed:
+        log.info(f"Client code is up to date: {target_dir}")
+        return False
+
+    sync_dir = _get_client_sync_dir(output_dir)
+    os.makedirs(sync_dir, exist_ok=True)
+    version_dir = tempfile.mkdtemp(prefix="version-", dir=sync_dir)
+    os.chmod(version_dir, 0o755)
+    linked = copied = 0
+    try:
+        for src_path, rel_path, previous_path in mapping:
+            dst_path = os.path.join(version_dir, rel_path)
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            if previous_path is not None:
+                try:
+                    os.link(previous_path, dst_path)
+                    linked += 1
+                    continue
+                except OSError:
+                    pass
+            _clone_file(src_path, dst_path)
+            # Keeps mtime so unchanged files are linked by next sync
+            shutil.copystat(src_path, dst_path)
+            copied += 1
+
+        trash_dir = tempfile.mkdtemp(prefix="previous-", dir=sync_dir)
+        os.rmdir(trash_dir)
+        _swap_client_dir(target_dir, version_dir, trash_dir)
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+
+    # Remove previous versions, files used by running process may fail
+    #   to be removed on Windows and are removed by next sync
+    current_version = os.path.realpath(target_dir)
+    for entry in os.scandir(sync_dir):
+        if os.path.realpath(entry.path) != current_version:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    log.info(
+        f"Client code synced to {target_dir}: {copied} files copied,"
+        f" {linked} linked, {removed} removed"
+    )
+    return True
+
 def auto_version_pyproject():
 
     with open("pyproject.toml", "r") as stream:
@@ -455,6 +1714,66 @@ def apply_version_to_package_py(version):
 
     return version
 
+def compute_fingerprints(
+    build_cache: BuildCache,
+    current_dir: str,
+    log: logging.Logger,
+    compressor: ZipCompressor,
+) -> str:
+    """Fingerprint inputs of all package stages.
+
+    Args:
+        build_cache (BuildCache): Cache where fingerprints are stored.
+        current_dir (str): Directory path of addon source.
+        log (logging.Logger): Logger object.
+        compressor (ZipCompressor): Compression settings affect zip outputs.
+
+    Returns:
+        str: Fingerprint of the whole package.
+    """
+
+    server_fingerprint = build_cache.add_fingerprint(
+        "server",
+        itertools.chain(
+            _iter_server_content(current_dir),
+            [(os.path.join(current_dir, "package.py"), "package.py")],
+        ),
+    )
+
+    frontend_fingerprint = ""
+    frontend_dirpath: str = os.path.join(current_dir, "frontend")
+    if os.path.exists(frontend_dirpath):
+        frontend_fingerprint = build_cache.add_fingerprint(
+            "frontend", _iter_frontend_sources(frontend_dirpath)
+        )
+
+    compression = compressor.settings_key
+    client_fingerprint = ""
+    if ADDON_CLIENT_DIR and os.path.isdir(_get_client_code_path(current_dir)):
+        _update_client_version(current_dir, log)
+        mapping = list(_iter_client_zip_content(current_dir, log))
+        pyproject_path = os.path.join(current_dir, "client", "pyproject.toml")
+        if os.path.exists(pyproject_path):
+            mapping.append((pyproject_path, "pyproject.toml"))
+        client_fingerprint = build_cache.add_fingerprint(
+            "client", mapping, compression
+        )
+
+    if build_cache.file_index is not None:
+        build_cache.file_index.save()
+
+    return build_cache.add_fingerprint(
+        "package",
+        [],
+        ADDON_NAME,
+        ADDON_VERSION,
+        compression,
+        server_fingerprint,
+        frontend_fingerprint,
+        client_fingerprint,
+    )
+
+
 def upload_and_restart_server(package_zip):
     ayon_api.upload_addon_zip(package_zip)
     ayon_api.trigger_server_restart()
@@ -467,7 +1786,16 @@ def main(
     only_client: Optional[bool] = False,
     auto_version: Optional[bool] = False,
     auto_upload: Optional[bool] = False,
+    use_cache: Optional[bool] = True,
+    jobs: Optional[int] = None,
+    compress_level: Optional[int] = None,
+    fast: Optional[bool] = False,
+    reproducible: Optional[bool] = False,
+    use_gitignore: Optional[bool] = False,
+    sync: Optional[bool] = False,
 ):
+    global USE_GITIGNORE
+
     log: logging.Logger = logging.getLogger("create_package")
     log.info("Start creating package")
 
@@ -479,24 +1807,68 @@ def main(
     if not output_dir:
         output_dir = os.path.join(current_dir, "package")
 
+    USE_GITIGNORE = bool(use_gitignore)
+
     if only_client:
         log.info("Creating client folder")
         if not output_dir:
             raise RuntimeError(
                 "Output directory must be defined" " for client only preparation."
             )
-        copy_client_code(current_dir, output_dir, log)
+        if sync:
+            sync_client_code(current_dir, output_dir, log)
+        else:
+            copy_client_code(current_dir, output_dir, log)
         log.info("Client folder created")
         return
 
     addon_output_root: str = os.path.join(output_dir, ADDON_NAME)
     addon_output_dir: str = os.path.join(addon_output_root, ADDON_VERSION)
+    package_zip: str = os.path.join(
+        output_dir, f"{ADDON_NAME}-{ADDON_VERSION}.zip"
+    )
+
+    if fast and compress_level is None:
+        compress_level = FAST_COMPRESS_LEVEL
+    date_time: Optional[tuple] = None
+    if reproducible or os.environ.get("SOURCE_DATE_EPOCH"):
+        date_time = get_reproducible_date_time()
+    compressor = ZipCompressor(jobs, compress_level, date_time=date_time)
+    build_cache: Optional[BuildCache] = None
+    if use_cache:
+        build_cache = BuildCache(current_dir)
+        compute_fingerprints(build_cache, current_dir, log, compressor)
+        # Only the zip is tracked, source folders are always recreated
+        if (
+            not skip_zip
+            and not keep_sources
+            and build_cache.is_fresh("package", package_zip)
+        ):
+            log.info(f"Package is up to date: {package_zip}")
+            if auto_upload:
+                upload_and_restart_server(package_zip)
+            return
+
     if os.path.isdir(addon_output_dir):
         log.info(f"Purging {addon_output_dir}")
         shutil.rmtree(output_dir)
 
     log.info(f"Preparing package for {ADDON_NAME}-{ADDON_VERSION}")
 
+    # Without source folders the zip is streamed directly from sources
+    if not skip_zip and not keep_sources:
+        write_server_package(
+            output_dir, current_dir, log, build_cache, compressor
+        )
+        write_package_manifest(package_zip, log)
+        if build_cache:
+            build_cache.store("package", package_zip)
+        compressor.log_report(log)
+        log.info("Package creation finished")
+        if auto_upload:
+            upload_and_restart_server(package_zip)
+        return
+
     if not os.path.exists(addon_output_dir):
         os.makedirs(addon_output_dir)
 
@@ -507,8 +1879,10 @@ def main(
     try:
         safe_copy_file(src_package_file, dst_package_file)
         copy_server_content(addon_output_dir, current_dir, log)
-        copy_frontend_content(addon_output_dir, current_dir, log)
-        zip_client_side(addon_output_dir, current_dir, log)
+        copy_frontend_content(addon_output_dir, current_dir, log, build_cache)
+        zip_client_side(
+            addon_output_dir, current_dir, log, build_cache, compressor
+        )
         failed = False
     finally:
         if failed and os.path.isdir(addon_output_dir):
@@ -517,14 +1891,18 @@ def main(
 
     # Skip server zipping
     if not skip_zip:
-        create_server_package(output_dir, addon_output_dir, log)
+        create_server_package(output_dir, addon_output_dir, log, compressor)
+        write_package_manifest(package_zip, log)
+        if build_cache:
+            build_cache.store("package", package_zip)
         # Remove sources only if zip file is created
         if not keep_sources:
             log.info("Removing source files for server package")
             shutil.rmtree(addon_output_root)
+    compressor.log_report(log)
     log.info("Package creation finished")
     if auto_upload:
-        upload_and_restart_server(os.path.join(output_dir, f"{ADDON_NAME}-{ADDON_VERSION}.zip"))
+        upload_and_restart_server(package_zip)
 
 
 
@@ -565,6 +1943,16 @@ if __name__ == "__main__":
             " Requires '-o', '--output' argument to be filled."
         ),
     )
+    parser.add_argument(
+        "--sync",
+        dest="sync",
+        action="store_true",
+        help=(
+            "With '--only-client' keep output as a mirror of client code."
+            " Unchanged files are kept, the others are cloned and the client"
+            " folder is swapped to the new version at once."
+        ),
+    )
     parser.add_argument(
         "--debug", dest="debug", action="store_true", help="Debug log messages."
     )
@@ -578,6 +1966,67 @@ if __name__ == "__main__":
             action="store_true",
             help="Automatically upload the package to the server."
     )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help=(
+            "Rebuild every stage even if its inputs did not change"
+            " since the previous run."
+        ),
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=None,
+        help=(
+            "Number of threads compressing zip members."
+            " Defaults to number of CPUs, '1' compresses serially."
+        ),
+    )
+
+    parser.add_argument(
+        "--compress-level",
+        dest="compress_level",
+        type=int,
+        choices=range(10),
+        default=None,
+        help="Deflate level of zip members, defaults to zlib default (6).",
+    )
+    parser.add_argument(
+        "--fast",
+        dest="fast",
+        action="store_true",
+        help=(
+            f"Use deflate level {FAST_COMPRESS_LEVEL} unless"
+            " '--compress-level' is set. Useful for packages uploaded"
+            " to local development server."
+        ),
+    )
+
+    parser.add_argument(
+        "--reproducible",
+        dest="reproducible",
+        action="store_true",
+        help=(
+            "Create byte reproducible zip files with sorted members, fixed"
+            " timestamps and normalized permissions. Timestamp is taken from"
+            " 'SOURCE_DATE_EPOCH', enabled automatically when it is set."
+        ),
+    )
+
+    parser.add_argument(
+        "--use-gitignore",
+        dest="use_gitignore",
+        action="store_true",
+        help=(
+            "Skip server and client files ignored by '.gitignore' in addon"
+            " root, additionally to the default ignore patterns."
+        ),
+    )
 
     args = parser.parse_args(sys.argv[1:])
     level = logging.INFO
@@ -585,4 +2034,18 @@ if __name__ == "__main__":
         level = logging.DEBUG
     logging.basicConfig(level=level)
     print(args.auto_version, args.auto_upload)
-    main(args.output_dir, args.skip_zip, args.keep_sources, args.only_client, args.auto_version, args.auto_upload)
+    main(
+        args.output_dir,
+        args.skip_zip,
+        args.keep_sources,
+        args.only_client,
+        args.auto_version,
+        args.auto_upload,
+        args.use_cache,
+        args.jobs,
+        args.compress_level,
+        args.fast,
+        args.reproducible,
+        args.use_gitignore,
+        args.sync,
+    )
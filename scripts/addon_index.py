@@ -0,0 +1,276 @@
+"""Index of addon metadata in the workspace.
+
+Metadata of each addon (its 'package.py', 'pyproject.toml' and git HEAD)
+is cached on disk and read again only when mtime or size of one of the
+source files changed. Git dirty state depends on the whole work tree, it
+is asked from git only when requested.
+"""
+
+import ast
+import dataclasses
+import importlib.util
+import json
+import os
+import pathlib
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+import toml
+
+ROOT_PATH = pathlib.Path(__file__).parent.parent
+ADDONS_FOLDER = ROOT_PATH / "addons"
+INDEX_FILE = ROOT_PATH / ".cache" / "addon_index.json"
+INDEX_VERSION = 1
+
+
+@dataclasses.dataclass
+class AddonMetadata:
+    path: str
+    name: Optional[str] = None
+    title: Optional[str] = None
+    version: Optional[str] = None
+    client_dir: Optional[str] = None
+    ayon_required_addons: dict = dataclasses.field(default_factory=dict)
+    pyproject_name: Optional[str] = None
+    pyproject_version: Optional[str] = None
+    git_head: Optional[str] = None
+    git_branch: Optional[str] = None
+    git_dirty: Optional[bool] = None
+
+
+def _read_package_py(package_file: pathlib.Path) -> dict:
+    """Values assigned in 'package.py' without executing it.
+
+    Files which compute the values are executed as a fallback.
+    """
+    values = {}
+    tree = ast.parse(package_file.read_bytes(), package_file.as_posix())
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+        ):
+            try:
+                values[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+
+    if "name" in values and "version" in values:
+        return values
+
+    spec = importlib.util.spec_from_file_location("package", package_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return {key: getattr(module, key) for key in dir(module)}
+
+
+def _get_git_dir(addon_path: pathlib.Path) -> Optional[pathlib.Path]:
+    git_path = addon_path / ".git"
+    if git_path.is_dir():
+        return git_path
+    if git_path.is_file():
+        # Worktrees and submodules point to their git directory
+        content = git_path.read_text().strip()
+        if content.startswith("gitdir:"):
+            return (addon_path / content[len("gitdir:"):].strip()).resolve()
+    return None
+
+
+def _read_git_head(git_dir: pathlib.Path) -> tuple:
+    """Commit and branch of HEAD read from git files.
+
+    Returns:
+        tuple[Optional[str], Optional[str], list[pathlib.Path]]: Commit
+            hash, branch name and files which were read.
+    """
+    head_file = git_dir / "HEAD"
+    head = head_file.read_text().strip()
+    if not head.startswith("ref:"):
+        return head, None, [head_file]
+
+    ref = head[len("ref:"):].strip()
+    branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+    # Linked worktrees keep refs in the main repository
+    common_dir = git_dir
+    common_dir_file = git_dir / "commondir"
+    if common_dir_file.exists():
+        common_dir = (git_dir / common_dir_file.read_text().strip()).resolve()
+
+    # Both files are in signature, commit may move ref from one to other
+    ref_file = common_dir / ref
+    packed_refs_file = common_dir / "packed-refs"
+    files = [head_file, ref_file, packed_refs_file]
+    if ref_file.exists():
+        return ref_file.read_text().strip(), branch, files
+
+    if packed_refs_file.exists():
+        for line in packed_refs_file.read_text().splitlines():
+            parts = line.split(" ")
+            if len(parts) == 2 and parts[1] == ref:
+                return parts[0], branch, files
+    return None, branch, files
+
+
+def _get_signature(paths: Iterable[pathlib.Path]) -> list:
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            signature.append([path.as_posix(), None, None])
+            continue
+        signature.append([path.as_posix(), stat.st_mtime_ns, stat.st_size])
+    return signature
+
+
+def _read_addon(addon_path: pathlib.Path) -> tuple:
+    """Read metadata of addon and the files it was read from."""
+    metadata = AddonMetadata(addon_path.as_posix())
+    package_file = addon_path / "package.py"
+    pyproject_file = addon_path / "pyproject.toml"
+    source_files = [package_file, pyproject_file]
+
+    if package_file.exists():
+        values = _read_package_py(package_file)
+        metadata.name = values.get("name")
+        metadata.title = values.get("title")
+        metadata.version = values.get("version")
+        metadata.client_dir = values.get("client_dir")
+        metadata.ayon_required_addons = dict(
+            values.get("ayon_required_addons") or {}
+        )
+
+    if pyproject_file.exists():
+        poetry_data = toml.load(pyproject_file).get("tool", {}).get("poetry", {})
+        metadata.pyproject_name = poetry_data.get("name")
+        metadata.pyproject_version = poetry_data.get("version")
+
+    git_dir = _get_git_dir(addon_path)
+    if git_dir is not None:
+        metadata.git_head, metadata.git_branch, git_files = _read_git_head(
+            git_dir
+        )
+        source_files.extend(git_files)
+    else:
+        # Refresh when repository is initialized
+        source_files.append(addon_path / ".git")
+    return metadata, source_files
+
+
+def get_git_dirty(addon_path: pathlib.Path) -> Optional[bool]:
+    """Work tree has uncommitted changes, None if it is not a repository."""
+    result = subprocess.run(
+        ["git", "status", "--porcelain", "--untracked-files=no"],
+        cwd=addon_path,
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        return None
+    return bool(result.stdout.strip())
+
+
+class AddonIndex:
+    """Cached metadata of addons refreshed by mtime of their sources.
+
+    Args:
+        index_file (pathlib.Path): File where the index is stored.
+    """
+
+    def __init__(self, index_file: pathlib.Path = INDEX_FILE):
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._changed = False
+        try:
+            data = json.loads(index_file.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self._entries = data["addons"]
+
+    def get(self, addon_path: pathlib.Path, git_status: bool = False) -> AddonMetadata:
+        """Metadata of addon, read again only if its sources changed.
+
+        Args:
+            addon_path (pathlib.Path): Addon root folder.
+            git_status (bool): Fill 'git_dirty', calls git.
+
+        Returns:
+            AddonMetadata: Metadata of addon.
+        """
+        addon_path = pathlib.Path(addon_path).resolve()
+        key = addon_path.as_posix()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or _get_signature(
+            pathlib.Path(item[0]) for item in entry["signature"]
+        ) != entry["signature"]:
+            metadata, source_files = _read_addon(addon_path)
+            entry = {
+                "signature": _get_signature(source_files),
+                "metadata": dataclasses.asdict(metadata),
+            }
+            with self._lock:
+                self._entries[key] = entry
+                self._changed = True
+
+        metadata = AddonMetadata(**entry["metadata"])
+        if git_status and metadata.git_head is not None:
+            metadata.git_dirty = get_git_dirty(addon_path)
+        return metadata
+
+    def get_addons(
+        self,
+        addon_paths: Optional[Iterable[pathlib.Path]] = None,
+        git_status: bool = False,
+    ) -> list[AddonMetadata]:
+        """Metadata of addons, defaults to all addons in 'addons' folder."""
+        if addon_paths is None:
+            addon_paths = sorted(
+                path for path in ADDONS_FOLDER.iterdir() if path.is_dir()
+            ) if ADDONS_FOLDER.exists() else []
+        with ThreadPoolExecutor() as executor:
+            addons = list(
+                executor.map(lambda path: self.get(path, git_status), addon_paths)
+            )
+        self.save()
+        return addons
+
+    def save(self):
+        """Write index to disk if it changed."""
+        with self._lock:
+            if not self._changed:
+                return
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.index_file.with_name(
+                f"{self.index_file.name}.{os.getpid()}.tmp"
+            )
+            tmp_file.write_text(
+                json.dumps({"version": INDEX_VERSION, "addons": self._entries})
+            )
+            os.replace(tmp_file, self.index_file)
+            self._changed = False
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> AddonIndex:
+    """Index shared by all commands of the process."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = AddonIndex()
+        return _index
+
+
+def get_addon(addon_path: pathlib.Path) -> AddonMetadata:
+    """Metadata of addon from shared index, stored to disk when changed."""
+    index = get_index()
+    metadata = index.get(addon_path)
+    index.save()
+    return metadata
@@ -0,0 +1,377 @@
+"""Watch addon sources and deploy them on every change.
+
+Changes are collected until the addon tree is quiet for a moment, then the
+addon is packaged again. Stages whose sources did not change are reused
+from build cache of 'create_package.py', so only the affected client zip,
+server files or frontend are rebuilt. The package is uploaded to server,
+or client code is copied to output directory with '--only-client'.
+
+Changes are reported by 'watchdog' when it is installed, otherwise the
+addon tree is polled.
+"""
+
+import pathlib
+import threading
+import time
+from typing import Iterable, Optional
+
+import click
+
+import fingerprint_index
+import upload_addons
+
+ADDONS_FOLDER = upload_addons.ADDONS_FOLDER
+DEFAULT_DEBOUNCE = 0.3
+DEFAULT_POLL_INTERVAL = 0.5
+# Folders of addon root named by the package stage they are built in
+STAGES = ("client", "frontend", "server")
+# Name and version are used by every stage
+ALL_STAGES_FILES = {"package.py", "pyproject.toml"}
+IGNORED_DIR_NAMES = {"__pycache__", "node_modules"}
+
+
+def get_stage(rel_path: str) -> Optional[str]:
+    """Stage affected by change of file, None if it is not a source.
+
+    Returns:
+        Optional[str]: 'client', 'server', 'frontend' or 'all'.
+    """
+    parts = rel_path.split("/")
+    if any(
+        part.startswith(".") or part in IGNORED_DIR_NAMES for part in parts
+    ):
+        return None
+    if parts[-1].endswith((".pyc", ".pyo")):
+        return None
+    if len(parts) == 1:
+        return "all" if parts[0] in ALL_STAGES_FILES else None
+    # Built frontend is output of the frontend stage
+    if parts[0] == "frontend" and parts[1] == "dist":
+        return None
+    return parts[0] if parts[0] in STAGES else None
+
+
+def get_stages(rel_paths: Iterable[str]) -> set:
+    stages = set()
+    for rel_path in rel_paths:
+        stage = get_stage(rel_path)
+        if stage == "all":
+            stages.update(STAGES)
+        elif stage:
+            stages.add(stage)
+    return stages
+
+
+class ChangeCollector:
+    """Changed files of addon collected until the tree is quiet.
+
+    Args:
+        addon_path (pathlib.Path): Addon root folder.
+        debounce (float): Seconds without change before changes are
+            returned.
+    """
+
+    def __init__(self, addon_path: pathlib.Path, debounce: float):
+        self.addon_path = addon_path.resolve()
+        self.debounce = debounce
+        self._changes = set()
+        self._first_change = None
+        self._last_change = 0.0
+        self._condition = threading.Condition()
+
+    def add(self, path: str):
+        """Record change of file by its absolute path."""
+        try:
+            rel_path = pathlib.Path(path).resolve().relative_to(self.addon_path)
+        except ValueError:
+            return
+        rel_path = rel_path.as_posix()
+        if get_stage(rel_path) is None:
+            return
+        with self._condition:
+            now = time.monotonic()
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+            self._changes.add(rel_path)
+            self._condition.notify()
+
+    def wait(self) -> tuple:
+        """Wait for changes followed by 'debounce' seconds of quiet.
+
+        Returns:
+            tuple[set[str], float]: Changed paths relative to addon root
+                and monotonic time of the first change.
+        """
+        with self._condition:
+            while True:
+                if not self._changes:
+                    self._condition.wait()
+                    continue
+                quiet_for = time.monotonic() - self._last_change
+                if quiet_for >= self.debounce:
+                    break
+                self._condition.wait(self.debounce - quiet_for)
+            changes, first_change = self._changes, self._first_change
+            self._changes = set()
+            self._first_change = None
+            return changes, first_change
+
+
+def _poll(collector: ChangeCollector, interval: float):
+    def snapshot():
+        return {
+            path: (file_stat.st_mtime_ns, file_stat.st_size)
+            for path, _, file_stat in fingerprint_index.iter_tree(
+                collector.addon_path.as_posix(),
+                fingerprint_index.DEFAULT_SOURCES,
+            )
+        }
+
+    previous = snapshot()
+    while True:
+        time.sleep(interval)
+        try:
+            current = snapshot()
+        except OSError:
+            # Files removed while the tree was walked
+            continue
+        for path in set(previous) | set(current):
+            if previous.get(path) != current.get(path):
+                collector.add(path)
+        previous = current
+
+
+def start_watching(collector: ChangeCollector, poll_interval: float) -> str:
+    """Feed collector with changes in background thread.
+
+    Returns:
+        str: Name of used method.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        threading.Thread(
+            target=_poll, args=(collector, poll_interval), daemon=True
+        ).start()
+        return "polling"
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            collector.add(event.src_path)
+            dest_path = getattr(event, "dest_path", None)
+            if dest_path:
+                collector.add(dest_path)
+
+    observer = Observer()
+    observer.schedule(
+        Handler(), collector.addon_path.as_posix(), recursive=True
+    )
+    observer.daemon = True
+    observer.start()
+    return "watchdog"
+
+
+class AddonDeployer:
+    """Package addon and deploy it to server or to output directory.
+
+    Args:
+        addon_name (str): Addon folder name.
+        output_dir (Optional[pathlib.Path]): Copy client code here
+            instead of uploading package.
+        sync (bool): Keep client code in 'output_dir' as a mirror
+            instead of copying all files again.
+        restart (bool): Restart server when server code changed.
+        restart_timeout (float): Seconds to wait for restarted server.
+        in_process (bool): Run packaging script in this process.
+    """
+
+    def __init__(
+        self,
+        addon_name: str,
+        output_dir: Optional[pathlib.Path] = None,
+        sync: bool = False,
+        restart: bool = True,
+        restart_timeout: float = upload_addons.RESTART_TIMEOUT,
+        in_process: bool = True,
+    ):
+        self.addon_name = addon_name
+        self.output_dir = output_dir
+        self.sync = sync
+        self.restart = restart
+        self.restart_timeout = restart_timeout
+        self.in_process = in_process
+        self._server_addons = None
+        self._ledger = None
+
+    def deploy(self, stages: set) -> bool:
+        """Deploy addon after its stages changed.
+
+        Returns:
+            bool: Something was deployed.
+        """
+        if self.output_dir is not None:
+            if "client" not in stages:
+                return False
+            options = {"output_dir": self.output_dir.as_posix()}
+            if self.sync:
+                # Older 'create_package.py' copies do not have the option
+                options["sync"] = True
+            upload_addons.create_package(
+                self.addon_name, self.in_process, only_client=True, **options
+            )
+            return True
+
+        package = upload_addons.package_addon(self.addon_name, self.in_process)
+        if self._server_addons is None:
+            self._server_addons = upload_addons.get_server_addons()
+            self._ledger = upload_addons.load_upload_ledger()
+        connection = upload_addons.get_worker_connection()
+        server_ledger = self._ledger.get(connection.get_base_url(), {})
+        if upload_addons.is_package_on_server(
+            package, self._server_addons, server_ledger
+        ):
+            print(f"Server already has {package.name} {package.version}")
+            return False
+
+        upload_addons.upload_package(package, self._ledger, connection)
+        self._server_addons.setdefault(package.name, set()).add(
+            package.version
+        )
+        if self.restart and "server" in stages:
+            upload_addons.restart_and_wait_for_server(self.restart_timeout)
+        return True
+
+
+def watch(
+    deployer: AddonDeployer,
+    debounce: float = DEFAULT_DEBOUNCE,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+):
+    """Deploy addon now and after every change until interrupted."""
+    addon_path = ADDONS_FOLDER / deployer.addon_name
+    collector = ChangeCollector(addon_path, debounce)
+    method = start_watching(collector, poll_interval)
+    print(f"Watching {addon_path.as_posix()} ({method}), press Ctrl+C to stop")
+
+    stages = set(STAGES)
+    first_change = None
+    while True:
+        start = time.monotonic()
+        try:
+            deployed = deployer.deploy(stages)
+        except (Exception, SystemExit) as exc:
+            print(f"Deploy failed, waiting for next change\n{exc}")
+        else:
+            if deployed:
+                now = time.monotonic()
+                message = f"Deployed {', '.join(sorted(stages))} in {now - start:.1f}s"
+                if first_change is not None:
+                    message += f", {now - first_change:.1f}s after change"
+                print(message)
+
+        changes, first_change = collector.wait()
+        stages = get_stages(changes)
+        print(f"Changed {len(changes)} files of {', '.join(sorted(stages))}")
+
+
+@click.command(
+    name="watch",
+    help="Repackages addon when its files change and deploys it.",
+)
+@click.argument("addon")
+@click.option(
+    "--only-client",
+    is_flag=True,
+    default=False,
+    help="Copy client code to '--output' instead of uploading to server.",
+)
+@click.option(
+    "-o",
+    "--output",
+    "output_dir",
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+    default=None,
+    help="Directory where client code is copied with '--only-client'.",
+)
+@click.option(
+    "--sync",
+    is_flag=True,
+    default=False,
+    help=(
+        "Update only changed client files in '--output' and swap the"
+        " client folder at once, needs current 'create_package.py'."
+    ),
+)
+@click.option(
+    "--debounce",
+    type=float,
+    default=DEFAULT_DEBOUNCE,
+    show_default=True,
+    help="Seconds without change before the addon is deployed.",
+)
+@click.option(
+    "--poll-interval",
+    type=float,
+    default=DEFAULT_POLL_INTERVAL,
+    show_default=True,
+    help="Seconds between checks of files when watchdog is not installed.",
+)
+@click.option(
+    "--no-restart",
+    is_flag=True,
+    default=False,
+    help="Never restart server, by default it restarts when server code changed.",
+)
+@click.option(
+    "--restart-timeout",
+    type=float,
+    default=upload_addons.RESTART_TIMEOUT,
+    show_default=True,
+    help="Seconds to wait for the server to be ready after restart.",
+)
+@click.option(
+    "--subprocess",
+    "subprocess_packaging",
+    is_flag=True,
+    default=False,
+    help="Run 'create_package.py' in poetry environment of the addon.",
+)
+def watch_cli(
+    addon,
+    only_client,
+    output_dir,
+    sync,
+    debounce,
+    poll_interval,
+    no_restart,
+    restart_timeout,
+    subprocess_packaging,
+):
+    if not (ADDONS_FOLDER / addon).is_dir():
+        raise click.BadParameter(
+            f"Addon '{addon}' was not found in {ADDONS_FOLDER.as_posix()}.",
+            param_hint="ADDON",
+        )
+    if only_client and output_dir is None:
+        raise click.UsageError("'--only-client' requires '--output'.")
+    if output_dir is not None and not only_client:
+        raise click.UsageError("'--output' is used only with '--only-client'.")
+    if sync and not only_client:
+        raise click.UsageError("'--sync' is used only with '--only-client'.")
+
+    deployer = AddonDeployer(
+        addon,
+        output_dir.resolve() if output_dir is not None else None,
+        sync=sync,
+        restart=not no_restart,
+        restart_timeout=restart_timeout,
+        in_process=not subprocess_packaging,
+    )
+    try:
+        watch(deployer, debounce, poll_interval)
+    except KeyboardInterrupt:
+        print("Stopped watching")
@@ -0,0 +1,100 @@
+"""Compare copy and sync of client code by 'create_package.py --only-client'.
+
+Creates temporary client code tree, copies it to output directory, edits
+one file and measures copying the client code again against syncing it.
+The synced output is compared with sources afterwards.
+
+Usage:
+    python scripts/benchmark_client_sync.py --files 2000
+"""
+
+import argparse
+import filecmp
+import logging
+import os
+import sys
+import tempfile
+
+from benchmark_client_zip import create_tree, measure
+from benchmark_file_walker import load_create_package
+
+
+def compare_trees(left, right):
+    """Relative paths of files which differ in the two trees."""
+    comparison = filecmp.dircmp(left, right, ignore=["__pycache__"])
+    differences = []
+    stack = [("", comparison)]
+    while stack:
+        prefix, current = stack.pop()
+        for name in (
+            current.left_only + current.right_only + current.diff_files
+        ):
+            differences.append(os.path.join(prefix, name))
+        for name, sub_comparison in current.subdirs.items():
+            stack.append((os.path.join(prefix, name), sub_comparison))
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--files-per-dir", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    create_package = load_create_package()
+    log = logging.getLogger("benchmark")
+
+    with tempfile.TemporaryDirectory(prefix="client_sync_benchmark_") as root:
+        client_dir = os.path.join(root, "client", create_package.ADDON_CLIENT_DIR)
+        copy_output = os.path.join(root, "copy")
+        sync_output = os.path.join(root, "sync")
+        print(f"Creating {args.files} files in {client_dir}")
+        create_tree(client_dir, args.files, args.files_per_dir)
+        create_package.sync_client_code(root, sync_output, log)
+
+        edited_file = os.path.join(client_dir, "pkg_0", "module_0.py")
+        edit_index = 0
+
+        def edit():
+            nonlocal edit_index
+            edit_index += 1
+            with open(edited_file, "a") as stream:
+                stream.write(f"\n# edit {edit_index}\n")
+
+        copy_time = measure(
+            "copy",
+            lambda: (
+                edit(),
+                create_package.copy_client_code(root, copy_output, log),
+            ),
+            args.repeat,
+        )
+        sync_time = measure(
+            "sync",
+            lambda: (
+                edit(),
+                create_package.sync_client_code(root, sync_output, log),
+            ),
+            args.repeat,
+        )
+        measure(
+            "sync without changes",
+            lambda: create_package.sync_client_code(root, sync_output, log),
+            args.repeat,
+        )
+
+        differences = compare_trees(
+            client_dir,
+            os.path.join(sync_output, create_package.ADDON_CLIENT_DIR),
+        )
+
+    if differences:
+        print(f"Synced client code differs: {', '.join(differences[:10])}")
+        return 1
+    print(f"Speedup: {copy_time / sync_time:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Compare full and incremental client zip of 'create_package.py'.
+
+Creates temporary client code tree, zips it, edits one file and measures
+writing the client zip from scratch against updating the previous one.
+Both zips are reproducible, so they are also compared byte by byte.
+
+Usage:
+    python scripts/benchmark_client_zip.py --files 2000
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmark_file_walker import load_create_package
+
+WORDS = (
+    "import def class return self value result path data name items for in"
+    " if else not None True False with open try except raise yield lambda"
+).split()
+
+
+def create_tree(client_dir, files_count, files_per_dir):
+    """Create nested directories with python like text files."""
+    rng = random.Random(0)
+    for index in range(files_count):
+        dirpath = os.path.join(client_dir, f"pkg_{index // files_per_dir}")
+        os.makedirs(dirpath, exist_ok=True)
+        lines = (
+            "    ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+            for _ in range(rng.randint(50, 400))
+        )
+        with open(os.path.join(dirpath, f"module_{index}.py"), "w") as stream:
+            stream.write("\n".join(lines))
+
+
+def measure(label, func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    best = min(durations)
+    print(f"{label:<28} {best:8.3f}s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--files-per-dir", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    create_package = load_create_package()
+    log = logging.getLogger("benchmark")
+    compressor = create_package.ZipCompressor(
+        args.jobs, date_time=create_package.ZIP_EPOCH_DATE_TIME
+    )
+
+    with tempfile.TemporaryDirectory(prefix="client_zip_benchmark_") as root:
+        client_dir = os.path.join(root, "client", create_package.ADDON_CLIENT_DIR)
+        print(f"Creating {args.files} files in {client_dir}")
+        create_tree(client_dir, args.files, args.files_per_dir)
+        build_cache = create_package.BuildCache(root)
+
+        def add_fingerprint():
+            build_cache.add_fingerprint(
+                "client",
+                create_package._iter_client_zip_content(root, log),
+                compressor.settings_key,
+            )
+
+        add_fingerprint()
+        previous_hashes = dict(build_cache.file_hashes["client"])
+        previous_zip = os.path.join(root, "previous.zip")
+        full_zip = os.path.join(root, "full.zip")
+        create_package._write_client_zip(previous_zip, root, log, compressor)
+
+        edited_file = os.path.join(client_dir, "pkg_0", "module_0.py")
+        with open(edited_file, "a") as stream:
+            stream.write("\n# edited\n")
+        measure("fingerprint (stat cached)", add_fingerprint, args.repeat)
+
+        full_time = measure(
+            "write from scratch",
+            lambda: create_package._write_client_zip(
+                full_zip, root, log, compressor
+            ),
+            args.repeat,
+        )
+        incremental_time = measure(
+            "update previous zip",
+            lambda: create_package._update_client_zip(
+                previous_zip,
+                previous_hashes,
+                root,
+                log,
+                build_cache,
+                compressor,
+            ),
+            args.repeat,
+        )
+
+        with open(full_zip, "rb") as stream:
+            full_content = stream.read()
+        with open(previous_zip, "rb") as stream:
+            updated_content = stream.read()
+
+    if full_content != updated_content:
+        print("Updated zip differs from zip written from scratch")
+        return 1
+    print(f"Speedup: {full_time / incremental_time:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Compare file walkers of addon 'create_package.py' on a synthetic tree.
+
+Creates temporary addon like tree with many small files and measures the
+legacy 'os.listdir' walker against 'iter_files_in_subdir'.
+
+Usage:
+    python scripts/benchmark_file_walker.py --files 100000
+"""
+
+import argparse
+import collections
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import types
+
+CREATE_PACKAGE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "addon-resources",
+    "create_package.py",
+)
+
+
+def load_create_package():
+    """Import 'create_package.py' template with placeholder 'package'."""
+    package = types.ModuleType("package")
+    package.name = "benchmark"
+    package.version = "0.0.0"
+    package.client_dir = "benchmark"
+    sys.modules.setdefault("package", package)
+
+    spec = importlib.util.spec_from_file_location(
+        "create_package", CREATE_PACKAGE_PATH
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def legacy_find_files_in_subdir(src_path, ignore_file_patterns, ignore_dir_patterns):
+    """Walker used by 'create_package.py' before 'os.scandir'."""
+    def match(value, regexes):
+        return any(regex.search(value) for regex in regexes)
+
+    output = []
+    hierarchy_queue = collections.deque()
+    hierarchy_queue.append((src_path, []))
+    while hierarchy_queue:
+        dirpath, parents = hierarchy_queue.popleft()
+        for name in os.listdir(dirpath):
+            path = os.path.join(dirpath, name)
+            if os.path.isfile(path):
+                if not match(name, ignore_file_patterns):
+                    items = list(parents)
+                    items.append(name)
+                    output.append((path, os.path.sep.join(items)))
+                continue
+
+            if not match(name, ignore_dir_patterns):
+                items = list(parents)
+                items.append(name)
+                hierarchy_queue.append((path, items))
+    return output
+
+
+def create_tree(root, files_count, files_per_dir):
+    """Create nested directories with small files and some ignored ones."""
+    for index in range(files_count):
+        dir_index = index // files_per_dir
+        dirpath = os.path.join(
+            root, f"pkg_{dir_index % 10}", f"sub_{dir_index}"
+        )
+        if index % files_per_dir == 0:
+            os.makedirs(os.path.join(dirpath, "__pycache__"), exist_ok=True)
+        filename = f"module_{index}.py"
+        if index % 10 == 0:
+            filename = f"module_{index}.pyc"
+        with open(os.path.join(dirpath, filename), "w") as stream:
+            stream.write("x = 1\n")
+
+
+def measure(label, func, repeat):
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+    best = min(durations)
+    print(f"{label:<32} {best:8.3f}s  ({len(result)} files)")
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--files-per-dir", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    create_package = load_create_package()
+    file_patterns = create_package.IGNORE_FILE_PATTERNS
+    dir_patterns = create_package.IGNORE_DIR_PATTERNS
+
+    with tempfile.TemporaryDirectory(prefix="walker_benchmark_") as root:
+        print(f"Creating {args.files} files in {root}")
+        create_tree(root, args.files, args.files_per_dir)
+
+        legacy_time, legacy = measure(
+            "os.listdir (legacy)",
+            lambda: legacy_find_files_in_subdir(
+                root, file_patterns, dir_patterns
+            ),
+            args.repeat,
+        )
+        scandir_time, current = measure(
+            "iter_files_in_subdir",
+            lambda: list(create_package.iter_files_in_subdir(root)),
+            args.repeat,
+        )
+        gitignore = create_package.GitIgnore(root, ["*_1.py", "pkg_9/"])
+        measure(
+            "iter_files_in_subdir+gitignore",
+            lambda: list(
+                create_package.iter_files_in_subdir(root, gitignore=gitignore)
+            ),
+            args.repeat,
+        )
+
+    if sorted(legacy) != sorted(item[:2] for item in current):
+        print("Walkers returned different files")
+        return 1
+    print(f"Speedup: {legacy_time / scandir_time:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Check startup time of 'manage.py' commands against a budget.
+
+Each command runs a few times with 'python -X importtime', the best wall
+time is compared to the budget. Only the time above bare interpreter
+startup counts, which excludes 'site' hooks of the environment running the
+benchmark, '--absolute' compares the whole wall time. Commands which do not
+talk to the server must not import heavy modules at all.
+
+The same check runs in 'tests/test_startup.py'.
+
+Usage:
+    python scripts/benchmark_startup.py --budget 100
+
+Exits with non-zero code when a command is over budget or imports any of
+the heavy modules.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+MANAGE_PY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "manage.py"
+)
+COMMANDS = [
+    ["--help"],
+    ["start-docker", "--help"],
+    ["init-docker", "--help"],
+    ["list", "--help"],
+]
+HEAVY_MODULES = {"ayon_api", "requests", "jinja2", "dotenv", "toml"}
+# Milliseconds above interpreter startup
+DEFAULT_BUDGET = 100.0
+DEFAULT_REPEAT = 5
+
+
+def run_command_time(cmd):
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def run_command(args):
+    """Run command once, return wall time in ms and imported modules.
+
+    Imported modules are mapped to cumulative import time in ms and flag
+    whether they were imported directly by 'manage.py' or 'site'.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", MANAGE_PY, *args],
+        capture_output=True,
+        text=True,
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{result.stderr}")
+
+    # Lines look like 'import time:  self | cumulative | module', nested
+    #   imports are indented by two spaces per level
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            is_top_level = not module[1:].startswith(" ")
+            imports[module.strip()] = (int(cumulative) / 1000, is_top_level)
+    return elapsed, imports
+
+
+def get_interpreter_startup(repeat: int = DEFAULT_REPEAT) -> float:
+    """Best wall time of bare interpreter startup in ms."""
+    return min(
+        run_command_time([sys.executable, "-c", "pass"])
+        for _ in range(repeat)
+    )
+
+
+def measure_command(args, repeat: int = DEFAULT_REPEAT):
+    """Best of 'repeat' runs of command, see 'run_command'."""
+    runs = [run_command(args) for _ in range(repeat)]
+    return min(runs, key=lambda run: run[0])
+
+
+def get_heavy_imports(imports) -> list:
+    return sorted(
+        module for module in imports
+        if module.split(".")[0] in HEAVY_MODULES
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget", type=float, default=DEFAULT_BUDGET, help="Budget in ms."
+    )
+    parser.add_argument(
+        "--absolute",
+        action="store_true",
+        help="Budget applies to whole wall time including interpreter startup.",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--top", type=int, default=5, help="Slowest imports to show."
+    )
+    args = parser.parse_args()
+
+    baseline = get_interpreter_startup(args.repeat)
+    print(f"Interpreter startup: {baseline:.1f} ms")
+
+    failed = False
+    for command in COMMANDS:
+        elapsed, imports = measure_command(command, args.repeat)
+        heavy = get_heavy_imports(imports)
+        measured = elapsed if args.absolute else elapsed - baseline
+        over_budget = measured > args.budget
+        failed = failed or over_budget or bool(heavy)
+        status = "FAIL" if over_budget or heavy else "ok"
+        print(
+            f"{status:<4} manage.py {' '.join(command):<22} {elapsed:6.1f} ms"
+            f" (+{elapsed - baseline:.1f} ms over interpreter)"
+        )
+        top_level = {
+            module: cumulative
+            for module, (cumulative, is_top_level) in imports.items()
+            if is_top_level
+        }
+        for module, cumulative in sorted(
+            top_level.items(), key=lambda item: item[1], reverse=True
+        )[:args.top]:
+            print(f"         {module:<30} {cumulative:6.1f} ms")
+        if heavy:
+            print(f"         heavy imports: {', '.join(heavy)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
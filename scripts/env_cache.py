@@ -0,0 +1,281 @@
+"""Shared virtual environments of addon packaging.
+
+Most addons generated from 'pyproject.jinja2' resolve to the same
+dependencies. Environments are keyed by hash of resolved dependencies,
+created once in the workspace cache and linked to addon as its '.venv',
+which poetry uses when it exists in the project. Addons without lock file
+are keyed by their declared dependencies, lock written by the install is
+recorded as alias of the created environment.
+
+Least recently used environments are evicted when the cache holds more
+than 'max_envs' of them. Environments linked to an addon or being used by
+this process are kept.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import Optional
+
+import toml
+
+ADDONS_FOLDER = pathlib.Path(__file__).parent.parent / "addons"
+ENVS_FOLDER = pathlib.Path(__file__).parent.parent / ".cache" / "envs"
+INDEX_FILE = ENVS_FOLDER / "index.json"
+MAX_ENVS_ENV = "AYON_WORKSPACE_MAX_ENVS"
+DEFAULT_MAX_ENVS = 8
+# Written to environment when its install finished
+READY_FILE = ".ready"
+
+_index_lock = threading.Lock()
+_env_locks = {}
+
+
+def get_max_envs() -> int:
+    return int(os.environ.get(MAX_ENVS_ENV) or DEFAULT_MAX_ENVS)
+
+
+def get_environment_key(addon_folder: pathlib.Path) -> str:
+    """Key of environment by dependencies of addon.
+
+    Lock file holds resolved dependencies. Without it only dependency
+    tables of 'pyproject.toml' are used, project name and other metadata
+    do not affect the environment.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{sys.version_info.major}.{sys.version_info.minor}\0".encode())
+    lock_file = addon_folder / "poetry.lock"
+    if lock_file.exists():
+        digest.update(b"lock\0" + lock_file.read_bytes())
+        return digest.hexdigest()[:16]
+
+    poetry_data = toml.load(addon_folder / "pyproject.toml").get("tool", {})
+    poetry_data = poetry_data.get("poetry", {})
+    dependencies = {
+        "dependencies": poetry_data.get("dependencies", {}),
+        "dev-dependencies": poetry_data.get("dev-dependencies", {}),
+        "group": {
+            name: group.get("dependencies", {})
+            for name, group in poetry_data.get("group", {}).items()
+        },
+    }
+    digest.update(json.dumps(dependencies, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def load_index() -> dict:
+    if not INDEX_FILE.exists():
+        return {"hits": 0, "misses": 0, "envs": {}}
+    try:
+        return json.loads(INDEX_FILE.read_text())
+    except ValueError:
+        return {"hits": 0, "misses": 0, "envs": {}}
+
+
+def _save_index(index: dict):
+    ENVS_FOLDER.mkdir(parents=True, exist_ok=True)
+    tmp_file = INDEX_FILE.with_name(f"{INDEX_FILE.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(json.dumps(index, indent=4, sort_keys=True))
+    os.replace(tmp_file, INDEX_FILE)
+
+
+def _record_use(key: str, addon_name: str, hit: bool):
+    with _index_lock:
+        index = load_index()
+        index["hits" if hit else "misses"] += 1
+        entry = index["envs"].setdefault(
+            key, {"addons": [], "hits": 0, "created": time.time()}
+        )
+        entry["last_used"] = time.time()
+        if hit:
+            entry["hits"] += 1
+        if addon_name not in entry["addons"]:
+            entry["addons"].append(addon_name)
+        _save_index(index)
+
+
+def _get_environment_name(key: str) -> str:
+    """Folder of environment with key, aliases point to another folder."""
+    with _index_lock:
+        return load_index().get("aliases", {}).get(key, key)
+
+
+def _record_alias(key: str, env_name: str):
+    with _index_lock:
+        index = load_index()
+        index.setdefault("aliases", {})[key] = env_name
+        _save_index(index)
+
+
+def _get_env_lock(key: str) -> threading.Lock:
+    with _index_lock:
+        return _env_locks.setdefault(key, threading.Lock())
+
+
+def _link_environment(addon_folder: pathlib.Path, env_path: pathlib.Path) -> bool:
+    """Point '.venv' of addon to shared environment.
+
+    Returns:
+        bool: Link exists, False if addon has its own environment or the
+            platform does not allow to create the link.
+    """
+    venv_path = addon_folder / ".venv"
+    if venv_path.is_symlink():
+        if pathlib.Path(os.readlink(venv_path)) == env_path:
+            return True
+        venv_path.unlink()
+    elif venv_path.exists():
+        # Own environment of addon is never removed
+        return False
+
+    try:
+        venv_path.symlink_to(env_path, target_is_directory=True)
+    except OSError:
+        if sys.platform != "win32":
+            return False
+        # Junctions do not need admin rights or developer mode
+        import _winapi
+
+        try:
+            _winapi.CreateJunction(str(env_path), str(venv_path))
+        except OSError:
+            return False
+    return True
+
+
+def _create_environment(addon_folder: pathlib.Path, env_path: pathlib.Path):
+    if env_path.exists():
+        # Leftover of interrupted install
+        shutil.rmtree(env_path)
+    subprocess.run(
+        [sys.executable, "-m", "venv", env_path.as_posix()],
+        check=True,
+        capture_output=True,
+    )
+    if not _link_environment(addon_folder, env_path):
+        shutil.rmtree(env_path)
+        raise OSError(f"Unable to link environment to {addon_folder.name}")
+
+    # Shared environment must not contain any addon itself
+    result = subprocess.run(
+        ["poetry", "install", "--no-root"],
+        cwd=addon_folder,
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        shutil.rmtree(env_path)
+        raise RuntimeError(
+            f"Unable to install environment of {addon_folder.name}\n"
+            f"{result.stderr.decode(errors='replace')}"
+        )
+    (env_path / READY_FILE).touch()
+
+
+def ensure_environment(addon_folder: pathlib.Path) -> Optional[pathlib.Path]:
+    """Link shared environment to addon, create it if there is none.
+
+    Returns:
+        Optional[pathlib.Path]: Path to environment or None if addon
+            can't use shared environment.
+    """
+    key = get_environment_key(addon_folder)
+    env_name = _get_environment_name(key)
+    env_path = ENVS_FOLDER / env_name
+    with _get_env_lock(env_name):
+        hit = (env_path / READY_FILE).exists()
+        if hit:
+            if not _link_environment(addon_folder, env_path):
+                return None
+        else:
+            try:
+                _create_environment(addon_folder, env_path)
+            except OSError:
+                return None
+            # Install writes 'poetry.lock' when addon has none, the next
+            #   run is keyed by it and must find this environment
+            lock_key = get_environment_key(addon_folder)
+            if lock_key != key:
+                _record_alias(lock_key, env_name)
+    _record_use(env_name, addon_folder.name, hit)
+    if not hit:
+        evict_environments(keep={env_name})
+    return env_path
+
+
+def get_folder_size(path: pathlib.Path) -> int:
+    size = 0
+    stack = [path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    size += entry.stat(follow_symlinks=False).st_size
+    return size
+
+
+def get_linked_environments() -> set:
+    """Keys of environments which are '.venv' of an addon in workspace."""
+    keys = set()
+    if not ADDONS_FOLDER.exists():
+        return keys
+    envs_folder = os.path.realpath(ENVS_FOLDER)
+    for addon_folder in ADDONS_FOLDER.iterdir():
+        venv_path = addon_folder / ".venv"
+        # Symlinks and junctions resolve to a different path
+        target = os.path.realpath(venv_path)
+        if os.path.dirname(target) == envs_folder:
+            keys.add(os.path.basename(target))
+    return keys
+
+
+def evict_environments(
+    max_envs: Optional[int] = None, keep: frozenset = frozenset()
+) -> list[str]:
+    """Remove least recently used environments above the limit.
+
+    Environments linked as '.venv' of an addon or locked by running
+    install are kept even if the cache stays above the limit.
+
+    Returns:
+        list[str]: Keys of removed environments.
+    """
+    if max_envs is None:
+        max_envs = get_max_envs()
+    with _index_lock:
+        index = load_index()
+        envs = index["envs"]
+        # Environments which are not in index are unknown, remove them first
+        if ENVS_FOLDER.exists():
+            for path in ENVS_FOLDER.iterdir():
+                if path.is_dir() and path.name not in envs:
+                    envs[path.name] = {"addons": [], "hits": 0, "last_used": 0}
+
+        keep = set(keep) | get_linked_environments()
+        keep.update(key for key, lock in _env_locks.items() if lock.locked())
+        removed = []
+        by_last_use = sorted(envs, key=lambda key: envs[key].get("last_used", 0))
+        for key in by_last_use:
+            if len(envs) <= max_envs:
+                break
+            if key in keep:
+                continue
+            env_path = ENVS_FOLDER / key
+            if env_path.exists():
+                shutil.rmtree(env_path)
+            del envs[key]
+            removed.append(key)
+        if removed:
+            aliases = index.get("aliases", {})
+            for alias, env_name in list(aliases.items()):
+                if env_name in removed:
+                    del aliases[alias]
+            _save_index(index)
+    return removed
@@ -0,0 +1,310 @@
+"""Persistent index of file fingerprints in an addon tree.
+
+Similar to git index, the index keeps size, mtime, inode and hash of each
+file, so only files whose stat changed are hashed again. Each scan stores
+a snapshot keyed by fingerprint of the whole tree, which allows to ask
+what changed since any recent fingerprint.
+
+The module uses only standard library, 'create_addon' copies it next to
+'create_package.py' of new addons.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+INDEX_DIR: str = os.path.join(".cache", "fingerprint_index")
+INDEX_VERSION: int = 1
+
+# Sources of addon package relative to addon root
+DEFAULT_SOURCES: tuple = (
+    "package.py",
+    "pyproject.toml",
+    "server",
+    "client",
+    "frontend",
+)
+IGNORE_DIR_NAMES: frozenset = frozenset({"__pycache__", "node_modules"})
+IGNORE_FILE_SUFFIXES: tuple = (".pyc", ".pyo")
+
+# Files modified this close to index write may change again without
+#   changing mtime on filesystems with coarse timestamps, they are rehashed
+RACY_WINDOW_NS: int = 2 * 10**9
+MAX_SNAPSHOTS: int = 8
+
+_indexes: dict = {}
+_indexes_lock = threading.Lock()
+
+
+class Changes(NamedTuple):
+    """Files changed between two fingerprints, relative to index root."""
+
+    added: list
+    modified: list
+    removed: list
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+
+def hash_file(path: str) -> str:
+    """Sha256 hex digest of file content."""
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_fingerprint(hashes: dict) -> str:
+    """Fingerprint of files by their relative paths and hashes."""
+    digest = hashlib.sha256()
+    for rel_path in sorted(hashes):
+        digest.update(f"{rel_path}\0{hashes[rel_path]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def iter_tree(root: str, sources: Iterable[str]) -> Iterator[tuple]:
+    """Iterate files of sources in root with their stat.
+
+    Directories starting with '.', python caches and node modules are
+    skipped.
+
+    Args:
+        root (str): Root directory.
+        sources (Iterable[str]): Files or directories relative to root.
+
+    Yields:
+        tuple[str, str, os.stat_result]: Path, path relative to root with
+            '/' separators and stat of the file.
+    """
+    stack: list = []
+    for source in sources:
+        path = os.path.join(root, source)
+        rel_path = source.replace(os.path.sep, "/")
+        if os.path.isdir(path):
+            stack.append((path, rel_path + "/"))
+        elif os.path.isfile(path):
+            yield path, rel_path, os.stat(path)
+
+    while stack:
+        dirpath, parent = stack.pop()
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir():
+                    if not name.startswith(".") and name not in IGNORE_DIR_NAMES:
+                        stack.append((entry.path, f"{parent}{name}/"))
+                elif entry.is_file() and not name.endswith(IGNORE_FILE_SUFFIXES):
+                    yield entry.path, parent + name, entry.stat()
+
+
+class FingerprintIndex:
+    """On-disk table of file stats and hashes in a directory tree.
+
+    Args:
+        root (str): Root directory, usually addon root.
+        index_dir (Optional[str]): Directory where index is stored.
+            Defaults to '.cache/fingerprint_index' in root.
+    """
+
+    def __init__(self, root: str, index_dir: Optional[str] = None):
+        self.root: str = os.path.abspath(root)
+        if index_dir is None:
+            index_dir = os.path.join(self.root, INDEX_DIR)
+        self.index_dir: str = index_dir
+        self._index_path: str = os.path.join(index_dir, "index.json")
+        self._snapshots_dir: str = os.path.join(index_dir, "snapshots")
+        # Relative path -> [size, mtime_ns, inode, hash]
+        self._entries: dict = {}
+        self._racy_after_ns: int = 0
+        self._changed: bool = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._index_path, "r") as stream:
+                data = json.load(stream)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+            return
+        self._entries = data["entries"]
+        self._racy_after_ns = data["written_ns"] - RACY_WINDOW_NS
+
+    def _get_key(self, path: str) -> str:
+        path = os.path.abspath(path)
+        if path.startswith(self.root + os.path.sep):
+            path = path[len(self.root) + 1:]
+        return path.replace(os.path.sep, "/")
+
+    def _get_hash(self, key: str, path: str, file_stat: os.stat_result) -> str:
+        entry = self._entries.get(key)
+        if (
+            entry is not None
+            and entry[0] == file_stat.st_size
+            and entry[1] == file_stat.st_mtime_ns
+            and entry[2] == file_stat.st_ino
+            and entry[1] < self._racy_after_ns
+        ):
+            return entry[3]
+
+        file_hash = hash_file(path)
+        self._entries[key] = [
+            file_stat.st_size,
+            file_stat.st_mtime_ns,
+            file_stat.st_ino,
+            file_hash,
+        ]
+        self._changed = True
+        return file_hash
+
+    def hash_file(
+        self, path: str, file_stat: Optional[os.stat_result] = None
+    ) -> str:
+        """Hash of file, calculated only if its stat changed.
+
+        Args:
+            path (str): Path to file.
+            file_stat (Optional[os.stat_result]): Stat of the file if
+                already known.
+
+        Returns:
+            str: Sha256 hex digest of file content.
+        """
+        if file_stat is None:
+            file_stat = os.stat(path)
+        return self._get_hash(self._get_key(path), path, file_stat)
+
+    def scan(self, sources: Iterable[str] = DEFAULT_SOURCES) -> str:
+        """Update index from files in the tree and store its snapshot.
+
+        Entries of files which are not in the tree anymore are removed.
+
+        Args:
+            sources (Iterable[str]): Files or directories relative to root
+                which are scanned.
+
+        Returns:
+            str: Fingerprint of scanned files.
+        """
+        return self._scan(sources)[0]
+
+    def _scan(self, sources: Iterable[str]) -> tuple:
+        hashes: dict = {}
+        for path, rel_path, file_stat in iter_tree(self.root, sources):
+            hashes[rel_path] = self._get_hash(rel_path, path, file_stat)
+
+        for key in set(self._entries) - set(hashes):
+            del self._entries[key]
+            self._changed = True
+
+        fingerprint = get_fingerprint(hashes)
+        self._store_snapshot(fingerprint, hashes)
+        self.save()
+        return fingerprint, hashes
+
+    def changed_since(
+        self, fingerprint: str, sources: Iterable[str] = DEFAULT_SOURCES
+    ) -> Optional[Changes]:
+        """Files changed since the tree had given fingerprint.
+
+        Args:
+            fingerprint (str): Fingerprint returned by previous 'scan'.
+            sources (Iterable[str]): Files or directories relative to root
+                which are compared.
+
+        Returns:
+            Optional[Changes]: Changed files or None if snapshot of the
+                fingerprint is not available anymore.
+        """
+        old_hashes = self._load_snapshot(fingerprint)
+        if old_hashes is None:
+            return None
+        new_hashes = self._scan(sources)[1]
+        return Changes(
+            sorted(set(new_hashes) - set(old_hashes)),
+            sorted(
+                rel_path
+                for rel_path, file_hash in new_hashes.items()
+                if rel_path in old_hashes and old_hashes[rel_path] != file_hash
+            ),
+            sorted(set(old_hashes) - set(new_hashes)),
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        """Fingerprint of files currently in index."""
+        return get_fingerprint(
+            {key: entry[3] for key, entry in self._entries.items()}
+        )
+
+    def save(self):
+        """Write index to disk if it changed."""
+        if not self._changed:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        written_ns = time.time_ns()
+        data = {
+            "version": INDEX_VERSION,
+            "root": self.root,
+            "written_ns": written_ns,
+            "entries": self._entries,
+        }
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as stream:
+            json.dump(data, stream, separators=(",", ":"))
+        os.replace(tmp_path, self._index_path)
+        self._racy_after_ns = written_ns - RACY_WINDOW_NS
+        self._changed = False
+
+    def _get_snapshot_path(self, fingerprint: str) -> str:
+        return os.path.join(self._snapshots_dir, f"{fingerprint}.json")
+
+    def _load_snapshot(self, fingerprint: str) -> Optional[dict]:
+        try:
+            with open(self._get_snapshot_path(fingerprint), "r") as stream:
+                return json.load(stream)
+        except (OSError, ValueError):
+            return None
+
+    def _store_snapshot(self, fingerprint: str, hashes: dict):
+        snapshot_path = self._get_snapshot_path(fingerprint)
+        if os.path.exists(snapshot_path):
+            # Mark as recently used
+            os.utime(snapshot_path)
+            return
+
+        os.makedirs(self._snapshots_dir, exist_ok=True)
+        tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as stream:
+            json.dump(hashes, stream, separators=(",", ":"))
+        os.replace(tmp_path, snapshot_path)
+
+        snapshots = sorted(
+            (
+                entry
+                for entry in os.scandir(self._snapshots_dir)
+                if entry.name.endswith(".json")
+            ),
+            key=lambda entry: entry.stat().st_mtime_ns,
+        )
+        for entry in snapshots[:-MAX_SNAPSHOTS]:
+            os.remove(entry.path)
+
+
+def get_index(root: str) -> FingerprintIndex:
+    """Index of root shared by the whole process.
+
+    Long running processes keep the index in memory between scans instead
+    of loading it from disk again.
+    """
+    root = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = FingerprintIndex(root)
+        return index
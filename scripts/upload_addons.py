@@ -1,66 +1,777 @@
+import dataclasses
+import hashlib
 import importlib.util
+import json
+import logging
+import os
 import pathlib
+import queue
+import re
+import shutil
 import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 
 import ayon_api
 import click
+import requests
 from dotenv import load_dotenv
 
+import addon_index
+import env_cache
+import fingerprint_index
+
 load_dotenv()
+log = logging.getLogger(__name__)
 ADDONS_FOLDER = pathlib.Path(__file__).parent.parent / "addons"
+# Digests of packages uploaded from this workspace per server
+UPLOAD_LEDGER_FILE = ADDONS_FOLDER.parent / ".cache" / "upload_ledger.json"
+DEFAULT_UPLOAD_JOBS = 4
+DEFAULT_PACKAGE_JOBS = max(1, min(4, (os.cpu_count() or 1) // 2))
+RESTART_TIMEOUT = 300
+ERROR_LINES = 5
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_RETRIES = 5
+# Seconds before first retry, doubled with each next retry
+UPLOAD_BACKOFF = 2.0
+UPLOAD_REPORT_INTERVAL = 2.0
+RETRY_STATUS_CODES = {502, 503, 504}
+# Statuses of addons in upload pipeline which are not failures
+SUCCESS_STATUSES = {"uploaded", "skipped"}
+# Seconds to connect and to wait for server, stalled uploads are retried
+UPLOAD_TIMEOUT = (30, 300)
+_worker_data = threading.local()
+# Connections and sessions of finished workers, long running processes
+#   reuse them in next commands instead of logging in again
+_idle_workers = []
+_idle_workers_lock = threading.Lock()
+_ledger_lock = threading.Lock()
+_module_import_lock = threading.Lock()
+# Hash of 'pyproject.toml' and 'poetry.lock' of installed addon environment
+ENVIRONMENT_STAMP = pathlib.Path(".cache", "poetry_env_hash")
+# Options of 'create_package.py' main and their command line arguments
+CREATE_PACKAGE_ARGS = {
+    "output_dir": "--output",
+    "only_client": "--only-client",
+    "fast": "--fast",
+    "use_gitignore": "--use-gitignore",
+    "sync": "--sync",
+}
+
+
+def get_worker_connection() -> ayon_api.ServerAPI:
+    """Server connection of current thread, its session is reused."""
+    connection = getattr(_worker_data, "connection", None)
+    if connection is not None:
+        return connection
+
+    global_connection = ayon_api.get_server_api_connection()
+    with _idle_workers_lock:
+        for index, (idle_connection, session) in enumerate(_idle_workers):
+            if (
+                idle_connection.get_base_url() == global_connection.get_base_url()
+                and idle_connection.access_token == global_connection.access_token
+            ):
+                del _idle_workers[index]
+                _worker_data.connection = idle_connection
+                _worker_data.session = session
+                return idle_connection
+
+    connection = ayon_api.ServerAPI(
+        global_connection.get_base_url(),
+        token=global_connection.access_token,
+        ssl_verify=global_connection.ssl_verify,
+        cert=global_connection.cert,
+    )
+    _worker_data.connection = connection
+    return connection
+
+
+def release_worker_connection():
+    """Return connection and session of current thread for reuse."""
+    connection = getattr(_worker_data, "connection", None)
+    if connection is None:
+        return
+    with _idle_workers_lock:
+        _idle_workers.append(
+            (connection, getattr(_worker_data, "session", None))
+        )
+    _worker_data.connection = None
+    _worker_data.session = None
+
+
+class UploadProgress:
+    """Report transferred size, throughput and ETA of an upload."""
+
+    def __init__(self, label: str, total: int):
+        self.label = label
+        self.total = total
+        self.transferred = 0
+        self._start = time.monotonic()
+        self._start_offset = 0
+        self._last_report = self._start
+
+    def restart(self, offset: int):
+        """Continue from offset after reconnect."""
+        self.transferred = offset
+        self._start_offset = offset
+        self._start = time.monotonic()
+
+    def update(self, size: int):
+        self.transferred += size
+        now = time.monotonic()
+        if now - self._last_report >= UPLOAD_REPORT_INTERVAL:
+            self._last_report = now
+            self.report()
+
+    @property
+    def speed(self) -> float:
+        """Bytes per second since start or last reconnect."""
+        elapsed = max(time.monotonic() - self._start, 1e-6)
+        return (self.transferred - self._start_offset) / elapsed
+
+    def report(self):
+        speed = self.speed
+        eta = ""
+        if speed:
+            eta = f", ETA {(self.total - self.transferred) / speed:.0f}s"
+        print(
+            f"{self.label}: {self.transferred / 2**20:.1f}"
+            f"/{self.total / 2**20:.1f} MB at {speed / 2**20:.1f} MB/s{eta}"
+        )
+
+
+class _FileSlice:
+    """Readable rest of file from offset, reads are reported to progress.
+
+    Has length so requests sends 'Content-Length' and streams the body
+    instead of loading it to memory.
+    """
+
+    def __init__(self, stream, offset: int, size: int, progress: UploadProgress):
+        self._stream = stream
+        self._remaining = size - offset
+        self._progress = progress
+        stream.seek(offset)
+
+    def __len__(self) -> int:
+        return self._remaining
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._stream.read(min(size, UPLOAD_CHUNK_SIZE))
+        self._remaining -= len(data)
+        self._progress.update(len(data))
+        return data
+
+
+def get_upload_session(connection: ayon_api.ServerAPI) -> requests.Session:
+    """HTTP session of current thread, keeps connections to server open.
+
+    Uses certificate settings of the connection, e.g. 'AYON_CA_FILE' and
+    'AYON_CERT_FILE'.
+    """
+    session = getattr(_worker_data, "session", None)
+    if session is None:
+        session = _worker_data.session = requests.Session()
+    session.verify = connection.ssl_verify
+    session.cert = connection.cert
+    return session
+
+
+def _supports_resume(session, url, headers) -> bool:
+    """Server accepts 'Content-Range' uploads continuing previous attempt."""
+    try:
+        response = session.options(url, headers=headers, timeout=30)
+    except requests.exceptions.RequestException:
+        return False
+    return response.headers.get("Accept-Ranges") == "bytes"
+
+
+def _get_uploaded_size(session, url, headers, size) -> int:
+    """Ask server how much of interrupted upload it received.
+
+    Server answers '308' with 'Range: bytes=0-<last byte>' header, same as
+    resumable uploads of common storage services.
+    """
+    try:
+        response = session.post(
+            url,
+            headers={**headers, "Content-Range": f"bytes */{size}"},
+            data=b"",
+            timeout=30,
+        )
+    except requests.exceptions.RequestException:
+        return 0
+    received = response.headers.get("Range", "")
+    if response.status_code != 308 or not received.startswith("bytes=0-"):
+        return 0
+    return int(received[len("bytes=0-"):]) + 1
+
 
+def upload_file(
+    connection: ayon_api.ServerAPI,
+    endpoint: str,
+    filepath: pathlib.Path,
+    retries: int = UPLOAD_RETRIES,
+) -> requests.Response:
+    """Stream file to server with progress, retries and resume.
 
-def upload_addon(addon_name: str):
+    Failed attempts are retried with exponential backoff. When server
+    supports it, the next attempt continues where the previous one ended,
+    otherwise the whole file is sent again.
+
+    Args:
+        connection (ayon_api.ServerAPI): Connection with url and auth.
+        endpoint (str): Endpoint relative to rest url, e.g.
+            'addons/install'.
+        filepath (pathlib.Path): File to upload.
+        retries (int): Number of retries after failed attempt.
+
+    Returns:
+        requests.Response: Response of successful upload.
+    """
+    session = get_upload_session(connection)
+    url = f"{connection.get_rest_url()}/{endpoint}"
+    headers = {
+        **connection.get_headers(),
+        "Content-Type": "application/octet-stream",
+        "x-file-name": filepath.name,
+    }
+    size = filepath.stat().st_size
+    progress = UploadProgress(filepath.name, size)
+    can_resume = _supports_resume(session, url, headers)
+
+    offset = 0
+    with open(filepath, "rb") as stream:
+        for attempt in range(retries + 1):
+            request_headers = headers
+            if offset:
+                request_headers = {
+                    **headers,
+                    "Content-Range": f"bytes {offset}-{size - 1}/{size}",
+                }
+            progress.restart(offset)
+            try:
+                response = session.post(
+                    url,
+                    data=_FileSlice(stream, offset, size, progress),
+                    headers=request_headers,
+                    timeout=UPLOAD_TIMEOUT,
+                )
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    progress.report()
+                    return response
+                error = f"status {response.status_code}"
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as exc:
+                error = exc.__class__.__name__
+
+            if attempt == retries:
+                raise RuntimeError(
+                    f"Upload of {filepath.name} failed after"
+                    f" {retries + 1} attempts ({error})."
+                )
+            delay = UPLOAD_BACKOFF * 2 ** attempt
+            offset = 0
+            if can_resume:
+                offset = _get_uploaded_size(session, url, headers, size)
+            print(
+                f"{filepath.name}: upload interrupted ({error}), retrying"
+                f" in {delay:.0f}s from {offset / 2**20:.1f} MB"
+            )
+            time.sleep(delay)
+
+
+def upload_addon_zip(
+    connection: ayon_api.ServerAPI, package_zip: pathlib.Path
+) -> dict:
+    """Upload addon zip, same as 'ayon_api.upload_addon_zip' with retries."""
+    return upload_file(connection, "addons/install", package_zip).json()
+
+
+def get_server_addons() -> dict[str, set[str]]:
+    """Addon versions available on the server by addon name."""
+    addons_info = ayon_api.get_addons_info(details=False)
+    return {
+        addon["name"]: set(addon.get("versions") or {})
+        for addon in addons_info["addons"]
+    }
+
+
+def load_upload_ledger() -> dict:
+    if not UPLOAD_LEDGER_FILE.exists():
+        return {}
+    try:
+        return json.loads(UPLOAD_LEDGER_FILE.read_text())
+    except ValueError:
+        return {}
+
+
+def save_upload_ledger(ledger: dict):
+    UPLOAD_LEDGER_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = UPLOAD_LEDGER_FILE.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps(ledger, indent=4, sort_keys=True))
+    os.replace(tmp_file, UPLOAD_LEDGER_FILE)
+
+
+def get_package_digest(package_zip: pathlib.Path) -> str:
+    """Sha256 of package, taken from its manifest if it is up to date."""
+    manifest_file = package_zip.with_suffix(".manifest.json")
+    zip_stat = package_zip.stat()
+    if (
+        manifest_file.exists()
+        and manifest_file.stat().st_mtime_ns >= zip_stat.st_mtime_ns
+    ):
+        try:
+            manifest = json.loads(manifest_file.read_text())
+        except ValueError:
+            manifest = {}
+        if manifest.get("size") == zip_stat.st_size and manifest.get("sha256"):
+            return manifest["sha256"]
+
+    file_hash = hashlib.sha256()
+    with open(package_zip, "rb") as stream:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+class AddonPackage(NamedTuple):
+    addon_name: str
+    name: str
+    version: str
+    package_zip: pathlib.Path
+    digest: str
+
+
+@dataclasses.dataclass
+class AddonResult:
+    """Outcome of addon in upload pipeline with time spent in each stage."""
+
+    addon_name: str
+    status: str = "pending"
+    error: str = ""
+    package_time: float = 0.0
+    upload_time: float = 0.0
+
+
+def package_addon(addon_name: str, in_process: bool = True) -> AddonPackage:
+    """Create package of addon and collect what is needed to upload it."""
     name, version = read_package(addon_name)
     addon_folder = ADDONS_FOLDER / addon_name
     expected_zip = addon_folder / f"package/{name}-{version}.zip"
-    create_package(addon_name)
+    create_package(addon_name, in_process)
     if not expected_zip.exists():
         raise FileNotFoundError(
             f"{expected_zip.name} Not found, run create package."
         )
-    ayon_api.upload_addon_zip(expected_zip)
+    return AddonPackage(
+        addon_name, name, version, expected_zip, get_package_digest(expected_zip)
+    )
 
 
-def upload_addons(addons):
-    for addon in addons:
+def is_package_on_server(
+    package: AddonPackage,
+    server_addons: dict[str, set[str]],
+    server_ledger: dict,
+) -> bool:
+    """Server has the same addon version uploaded from the same package."""
+    with _ledger_lock:
+        uploaded_digest = server_ledger.get(package.name, {}).get(
+            package.version
+        )
+    return (
+        package.version in server_addons.get(package.name, ())
+        and uploaded_digest == package.digest
+    )
+
+
+def upload_package(
+    package: AddonPackage,
+    ledger: dict,
+    connection: ayon_api.ServerAPI,
+):
+    """Upload addon package and record its digest in ledger."""
+    upload_addon_zip(connection, package.package_zip)
+    with _ledger_lock:
+        server_ledger = ledger.setdefault(connection.get_base_url(), {})
+        server_ledger.setdefault(package.name, {})[package.version] = (
+            package.digest
+        )
+        save_upload_ledger(ledger)
+
+
+def upload_addon(
+    addon_name: str,
+    server_addons: dict[str, set[str]] = None,
+    ledger: dict = None,
+    force: bool = False,
+    connection: ayon_api.ServerAPI = None,
+) -> bool:
+    """Create package of addon and upload it unless server already has it.
+
+    Addon is skipped when the server has the same name and version and the
+    ledger holds the same package digest for the server.
+
+    Returns:
+        bool: Package was uploaded.
+    """
+    if connection is None:
+        connection = ayon_api.get_server_api_connection()
+    if ledger is None:
+        ledger = {}
+    package = package_addon(addon_name)
+    server_ledger = ledger.get(connection.get_base_url(), {})
+    if (
+        not force
+        and server_addons is not None
+        and is_package_on_server(package, server_addons, server_ledger)
+    ):
+        print(
+            f"Skipping {package.name} {package.version},"
+            " server already has this package."
+        )
+        return False
+
+    upload_package(package, ledger, connection)
+    return True
+
+
+def _package_stage(
+    addon_name,
+    results,
+    upload_queue,
+    server_addons,
+    server_ledger,
+    force,
+    in_process,
+):
+    result = results[addon_name]
+    start = time.perf_counter()
+    try:
+        package = package_addon(addon_name, in_process)
+    except (Exception, SystemExit) as exc:
+        result.status = "package failed"
+        result.error = str(exc).strip()
+        return
+    finally:
+        result.package_time = time.perf_counter() - start
+
+    try:
+        if not force and is_package_on_server(
+            package, server_addons, server_ledger
+        ):
+            result.status = "skipped"
+            return
+        # Blocks while uploads are behind, packaging waits for free slot
+        upload_queue.put(package)
+    except Exception as exc:
+        result.status = "failed"
+        result.error = str(exc).strip()
+
+
+def _upload_stage(upload_queue, results, ledger):
+    try:
+        _upload_packages(upload_queue, results, ledger)
+    finally:
+        release_worker_connection()
+
+
+def _upload_packages(upload_queue, results, ledger):
+    connection = None
+    while True:
+        package = upload_queue.get()
+        if package is None:
+            return
+        result = results[package.addon_name]
+        start = time.perf_counter()
         try:
-            upload_addon(addon)
-        except FileNotFoundError:
-            print(f"Unable to upload {addon} not package created.")
+            if connection is None:
+                connection = get_worker_connection()
+            upload_package(package, ledger, connection)
+            result.status = "uploaded"
+        except Exception as exc:
+            result.status = "upload failed"
+            result.error = str(exc).strip()
+        finally:
+            result.upload_time = time.perf_counter() - start
+        print(f"{result.status.capitalize()} {package.addon_name}")
 
 
-def read_package(addon_name: str) -> tuple[str, str]:
-    addon_folder = ADDONS_FOLDER / addon_name
-    package_py = addon_folder / "package.py"
+def print_results(results: list[AddonResult], elapsed: float):
+    for result in results:
+        line = (
+            f"{result.addon_name}: {result.status}"
+            f" (package {result.package_time:.1f}s,"
+            f" upload {result.upload_time:.1f}s)"
+        )
+        if result.error:
+            # Packaging errors hold whole stderr, the end is relevant
+            error_lines = result.error.splitlines()[-ERROR_LINES:]
+            line += "".join(f"\n    {error_line}" for error_line in error_lines)
+        print(line)
+    package_time = sum(result.package_time for result in results)
+    upload_time = sum(result.upload_time for result in results)
+    print(
+        f"Finished in {elapsed:.1f}s, packaging took {package_time:.1f}s"
+        f" and uploads {upload_time:.1f}s in total."
+    )
+
 
-    spec = importlib.util.spec_from_file_location("package", package_py)
+def upload_addons(
+    addons,
+    force=False,
+    jobs=DEFAULT_UPLOAD_JOBS,
+    package_jobs=DEFAULT_PACKAGE_JOBS,
+    in_process=True,
+) -> list[AddonResult]:
+    """Package and upload addons, skipping those the server already has.
+
+    Packaging and uploading run as a pipeline. Packaging workers feed
+    a bounded queue consumed by upload workers, so uploads start while
+    other addons are still being packaged.
+
+    Args:
+        addons (Iterable[str]): Addon folder names.
+        force (bool): Upload even if the server already has the package.
+        jobs (int): Number of upload workers, each worker uses its own
+            server connection.
+        package_jobs (int): Number of addons packaged at the same time.
+        in_process (bool): Run packaging scripts in this process.
+
+    Returns:
+        list[AddonResult]: Result of each addon.
+    """
+    start = time.perf_counter()
+    server_addons = get_server_addons()
+    ledger = load_upload_ledger()
+    server_ledger = ledger.setdefault(ayon_api.get_base_url(), {})
+    results = {addon: AddonResult(addon) for addon in addons}
+    upload_queue = queue.Queue(maxsize=max(1, jobs))
+
+    upload_threads = [
+        threading.Thread(
+            target=_upload_stage, args=(upload_queue, results, ledger)
+        )
+        for _ in range(max(1, jobs))
+    ]
+    for thread in upload_threads:
+        thread.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, package_jobs)) as executor:
+            futures = {
+                executor.submit(
+                    _package_stage,
+                    addon,
+                    results,
+                    upload_queue,
+                    server_addons,
+                    server_ledger,
+                    force,
+                    in_process,
+                ): addon
+                for addon in results
+            }
+            for future, addon in futures.items():
+                # Errors outside of the handled stages end up here
+                exc = future.exception()
+                if exc is not None:
+                    results[addon].status = "failed"
+                    results[addon].error = str(exc).strip()
+    finally:
+        for _ in upload_threads:
+            upload_queue.put(None)
+        for thread in upload_threads:
+            thread.join()
+
+    results = list(results.values())
+    print_results(results, time.perf_counter() - start)
+    return results
+
+
+def restart_and_wait_for_server(timeout: float = RESTART_TIMEOUT):
+    """Restart server and wait until it is ready again.
+
+    Server is ready when it responds and its uptime is shorter than time
+    elapsed since the restart was triggered. Servers which do not report
+    uptime are ready when they respond after they were seen down.
+    """
+    connection = ayon_api.get_server_api_connection()
+    start = time.monotonic()
+    connection.trigger_server_restart()
+    print("Waiting for server to restart")
+    was_down = False
+    while True:
+        elapsed = time.monotonic() - start
+        try:
+            info = connection.get_info()
+        except Exception:
+            # Server is down while restarting
+            was_down = True
+        else:
+            if "uptime" in info:
+                if info["uptime"] <= elapsed:
+                    break
+            elif was_down:
+                break
+        if elapsed > timeout:
+            raise TimeoutError(
+                f"Server did not restart within {timeout} seconds."
+            )
+        time.sleep(1)
+    print(f"Server is ready after {time.monotonic() - start:.1f}s")
+
+
+def _load_module(filepath: pathlib.Path, module_name: str):
+    spec = importlib.util.spec_from_file_location(module_name, filepath)
     module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(module)
+    return module
+
 
-    version = module.version
-    name = module.name
+def read_package(addon_name: str) -> tuple[str, str]:
+    metadata = addon_index.get_addon(ADDONS_FOLDER / addon_name)
+    return metadata.name, metadata.version
 
-    return name, version
 
+def load_create_package(addon_name: str):
+    """Import 'create_package.py' of addon as a separate module.
 
-def create_package(addon_name: str):
+    The script imports 'package' at module load, so the addon's own
+    'package.py' is put to 'sys.modules' while it is imported. Each call
+    returns a new module, state of one addon never leaks to another.
+    """
     addon_folder = ADDONS_FOLDER / addon_name
-    pyproject_file = addon_folder / '.pyproject.toml'
-    if pyproject_file.exists():
-        cmd = f"poetry install && poetry env use python && python ./create_package.py"
-    else:
-        cmd = f"python ./create_package.py"
-    result = subprocess.run(cmd, cwd=addon_folder.as_posix(), shell=True, capture_output=True)
+    module_suffix = re.sub(r"\W", "_", addon_name)
+    package_module = _load_module(
+        addon_folder / "package.py", f"package_{module_suffix}"
+    )
+    with _module_import_lock:
+        previous_package = sys.modules.get("package")
+        sys.modules["package"] = package_module
+        # Modules next to the script import as when it runs directly
+        sys.path.insert(0, addon_folder.as_posix())
+        try:
+            return _load_module(
+                addon_folder / "create_package.py",
+                f"create_package_{module_suffix}",
+            )
+        finally:
+            sys.path.remove(addon_folder.as_posix())
+            if previous_package is None:
+                sys.modules.pop("package", None)
+            else:
+                sys.modules["package"] = previous_package
+
+
+def get_addon_index(addon_name: str) -> fingerprint_index.FingerprintIndex:
+    """Fingerprint index of addon sources, shared with 'create_package.py'."""
+    return fingerprint_index.get_index(ADDONS_FOLDER / addon_name)
+
+
+def get_environment_hash(addon_folder: pathlib.Path) -> str:
+    """Hash of files defining dependencies of addon environment."""
+    digest = hashlib.sha256()
+    for filename in ("pyproject.toml", "poetry.lock"):
+        filepath = addon_folder / filename
+        if filepath.exists():
+            digest.update(filename.encode() + b"\0" + filepath.read_bytes())
+    return digest.hexdigest()
+
+
+def ensure_addon_environment(addon_folder: pathlib.Path):
+    """Install poetry environment of addon only if its dependencies changed."""
+    stamp_file = addon_folder / ENVIRONMENT_STAMP
+    environment_hash = get_environment_hash(addon_folder)
+    if stamp_file.exists() and stamp_file.read_text() == environment_hash:
+        return
+
+    result = subprocess.run(
+        ["poetry", "install"], cwd=addon_folder, capture_output=True
+    )
     if result.returncode != 0:
-        raise RuntimeError(f"Unable to Create package for {addon_name}\n{result.stderr}")
-    
+        raise RuntimeError(
+            f"Unable to install environment of {addon_folder.name}\n"
+            f"{result.stderr.decode(errors='replace')}"
+        )
+    stamp_file.parent.mkdir(parents=True, exist_ok=True)
+    # Install writes 'poetry.lock' when it is missing
+    stamp_file.write_text(get_environment_hash(addon_folder))
+
+
+def _get_create_package_args(options: dict) -> list[str]:
+    """Command line arguments of 'create_package.py' for 'main' options."""
+    args = []
+    for key, value in options.items():
+        if key not in CREATE_PACKAGE_ARGS:
+            raise ValueError(f"Option '{key}' can't be passed to subprocess.")
+        if value is True:
+            args.append(CREATE_PACKAGE_ARGS[key])
+        elif value not in (None, False):
+            args.extend([CREATE_PACKAGE_ARGS[key], str(value)])
+    return args
+
+
+def _create_package_subprocess(addon_folder: pathlib.Path, options: dict):
+    cmd = [sys.executable, "create_package.py"]
+    if (addon_folder / "pyproject.toml").exists() and shutil.which("poetry"):
+        # Addons with own '.venv' or without link support install their own
+        if env_cache.ensure_environment(addon_folder) is None:
+            ensure_addon_environment(addon_folder)
+        cmd = ["poetry", "run", "python", "create_package.py"]
+    cmd.extend(_get_create_package_args(options))
+    result = subprocess.run(cmd, cwd=addon_folder, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Unable to Create package for {addon_folder.name}\n"
+            f"{result.stderr.decode(errors='replace')}"
+        )
+
+
+def create_package(addon_name: str, in_process: bool = True, **options):
+    """Create package of addon.
+
+    By default the addon's 'create_package.py' runs in this process. If it
+    can't be imported, e.g. it needs dependencies of its own, or when
+    'in_process' is disabled, it runs in the addon's poetry environment.
+
+    Args:
+        addon_name (str): Addon folder name.
+        in_process (bool): Run packaging script in this process.
+        **options: Keyword arguments of 'main' of 'create_package.py',
+            see 'CREATE_PACKAGE_ARGS' for supported ones.
+    """
+    addon_folder = ADDONS_FOLDER / addon_name
+    create_package_module = None
+    if in_process:
+        try:
+            create_package_module = load_create_package(addon_name)
+        except ImportError as exc:
+            log.warning(
+                f"Packaging {addon_name} in subprocess, its 'create_package.py'"
+                f" can't be imported in workspace environment: {exc}"
+            )
+
+    if create_package_module is None:
+        _create_package_subprocess(addon_folder, options)
+    else:
+        create_package_module.main(**options)
+
     print(f"Package Created: {addon_folder.as_posix()}")
 
 
-def create_packages(addons):
+def create_packages(addons, in_process=True):
     for addon in addons:
-        create_package(addon)
+        create_package(addon, in_process)
 
 @click.command(
     name="addons",
@@ -70,8 +781,56 @@ def create_packages(addons):
 @click.option("-a", "--all-addons", is_flag=True, default=False)
 @click.option("-c", "--create-package-only", is_flag=True, default=False)
 @click.option("-r", "--restart-server", is_flag=True, default=False)
+@click.option(
+    "-f",
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Upload packages even if the server already has them.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=DEFAULT_UPLOAD_JOBS,
+    show_default=True,
+    help="Number of addons uploaded at the same time.",
+)
+@click.option(
+    "-p",
+    "--package-jobs",
+    type=click.IntRange(min=1),
+    default=DEFAULT_PACKAGE_JOBS,
+    show_default=True,
+    help="Number of addons packaged at the same time.",
+)
+@click.option(
+    "--restart-timeout",
+    type=float,
+    default=RESTART_TIMEOUT,
+    show_default=True,
+    help="Seconds to wait for the server to be ready after restart.",
+)
+@click.option(
+    "--subprocess",
+    "subprocess_packaging",
+    is_flag=True,
+    default=False,
+    help=(
+        "Run 'create_package.py' of each addon in its poetry environment"
+        " instead of in this process."
+    ),
+)
 def upload_addons_cli(
-    addons, all_addons=False, create_package_only=False, restart_server=False
+    addons,
+    all_addons=False,
+    create_package_only=False,
+    restart_server=False,
+    force=False,
+    jobs=DEFAULT_UPLOAD_JOBS,
+    package_jobs=DEFAULT_PACKAGE_JOBS,
+    restart_timeout=RESTART_TIMEOUT,
+    subprocess_packaging=False,
 ):
     if not all_addons:
         vaild_addons = set(
@@ -90,13 +849,23 @@ def upload_addons_cli(
     else:
         addons = [x.name for x in ADDONS_FOLDER.iterdir() if x.is_dir()]
 
+    failed = False
     if not create_package_only:
-        upload_addons(addons)
+        results = upload_addons(
+            addons, force, jobs, package_jobs, not subprocess_packaging
+        )
+        # Addons left pending were lost by a crashed stage
+        failed = any(
+            result.status not in SUCCESS_STATUSES for result in results
+        )
     else:
-        create_packages(addons)
+        create_packages(addons, not subprocess_packaging)
 
+    # Restart once after the whole batch
     if restart_server:
-        ayon_api.trigger_server_restart()
+        restart_and_wait_for_server(restart_timeout)
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,535 @@
+"""Long running workspace daemon serving 'manage.py' commands warm.
+
+The daemon listens on a Unix socket in the workspace cache. Commands which
+benefit from warm state are forwarded to it by 'manage.py' and executed in
+the daemon process, their output is streamed back. The daemon keeps the
+server connection, addon metadata and fingerprint indexes in memory and
+refreshes them in idle time when addon files change.
+
+Changes are reported by 'watchdog' when it is installed, otherwise addons
+are polled. When the daemon is not running, is outdated or runs with
+different environment, commands run in process as before.
+
+Messages are json objects separated by new lines.
+"""
+
+import contextlib
+import itertools
+import json
+import os
+import pathlib
+import shutil
+import socket
+import sys
+import threading
+import time
+from typing import Iterable, Iterator, Optional
+
+ROOT_PATH = pathlib.Path(__file__).parent.parent
+CACHE_FOLDER = ROOT_PATH / ".cache"
+ADDONS_FOLDER = ROOT_PATH / "addons"
+LOG_FILE = CACHE_FOLDER / "daemon.log"
+DISABLE_ENV = "AYON_WORKSPACE_NO_DAEMON"
+# Commands which are forwarded, others always run in process
+FORWARDED_COMMANDS = {"addons", "envs", "fingerprint", "list"}
+DEFAULT_POLL_INTERVAL = 5.0
+# Polled in addition to fingerprint sources, reflog changes on every
+#   commit, switch or pull so addon metadata follows git HEAD
+POLL_GIT_FILES = (".git/HEAD", ".git/logs/HEAD")
+# Events closer than this are refreshed together
+DEBOUNCE_INTERVAL = 0.5
+CONNECT_TIMEOUT = 1.0
+# Unix socket paths are limited to ~104 bytes on macOS
+MAX_SOCKET_PATH = 100
+
+
+def is_supported() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+def get_socket_path() -> str:
+    socket_path = (CACHE_FOLDER / "daemon.sock").as_posix()
+    if len(socket_path) <= MAX_SOCKET_PATH:
+        return socket_path
+    import hashlib
+    import tempfile
+
+    workspace_hash = hashlib.sha256(
+        ROOT_PATH.resolve().as_posix().encode()
+    ).hexdigest()[:12]
+    return os.path.join(
+        tempfile.gettempdir(), f"ayon-workspace-{workspace_hash}.sock"
+    )
+
+
+def get_client_env() -> dict:
+    """Environment which must match between client and daemon."""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key.startswith("AYON_") and key != DISABLE_ENV
+    }
+    env["python"] = sys.executable
+    return env
+
+
+def get_code_signature() -> list:
+    """Stat of files the daemon loaded, daemon is outdated when it changes."""
+    paths = [ROOT_PATH / "manage.py", ROOT_PATH / ".env"]
+    paths.extend(sorted((ROOT_PATH / "scripts").glob("*.py")))
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            signature.append([path.name, None, None])
+            continue
+        signature.append([path.name, stat.st_mtime_ns, stat.st_size])
+    return signature
+
+
+def send_message(connection: socket.socket, message: dict):
+    connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def iter_messages(connection: socket.socket) -> Iterator[dict]:
+    with connection.makefile("rb") as stream:
+        for line in stream:
+            yield json.loads(line)
+
+
+def connect() -> Optional[socket.socket]:
+    """Connection to running daemon, None if it is not running."""
+    if not is_supported():
+        return None
+    socket_path = get_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.settimeout(CONNECT_TIMEOUT)
+    try:
+        connection.connect(socket_path)
+    except OSError:
+        connection.close()
+        return None
+    # Commands may run for minutes
+    connection.settimeout(None)
+    return connection
+
+
+def request(message: dict) -> Optional[dict]:
+    """Send control request to daemon, None if it is not running."""
+    connection = connect()
+    if connection is None:
+        return None
+    with connection:
+        try:
+            send_message(connection, message)
+            for response in iter_messages(connection):
+                return response
+        except (OSError, ValueError):
+            # Daemon is stopping
+            pass
+    return None
+
+
+def forward(args: list) -> Optional[int]:
+    """Run 'manage.py' command in daemon if it is running.
+
+    Args:
+        args (list[str]): Command line arguments without program name.
+
+    Returns:
+        Optional[int]: Exit code of the command or None when it must run
+            in process.
+    """
+    if (
+        not args
+        or args[0] not in FORWARDED_COMMANDS
+        or os.environ.get(DISABLE_ENV)
+    ):
+        return None
+    connection = connect()
+    if connection is None:
+        return None
+
+    with connection:
+        try:
+            send_message(
+                connection,
+                {
+                    "type": "run",
+                    "args": args,
+                    "cwd": os.getcwd(),
+                    "env": get_client_env(),
+                    "columns": shutil.get_terminal_size().columns,
+                },
+            )
+            messages = iter_messages(connection)
+            message = next(messages, None)
+        except (OSError, ValueError):
+            message = None
+        # Daemon which is stopping did not run the command
+        if message is None:
+            return None
+
+        try:
+            for message in itertools.chain([message], messages):
+                if "out" in message:
+                    sys.stdout.write(message["out"])
+                    sys.stdout.flush()
+                elif "err" in message:
+                    sys.stderr.write(message["err"])
+                    sys.stderr.flush()
+                elif "exit" in message:
+                    return message["exit"]
+                elif "fallback" in message:
+                    if message.get("notice"):
+                        print(message["fallback"], file=sys.stderr)
+                    return None
+        except (OSError, ValueError):
+            pass
+    print("Workspace daemon closed connection unexpectedly.", file=sys.stderr)
+    return 1
+
+
+class _SocketStream:
+    """Text stream sending writes to client, used as stdout and stderr.
+
+    Output is dropped when the client disconnects, so the command is not
+    interrupted in the middle.
+    """
+
+    encoding = "utf-8"
+    errors = "replace"
+
+    def __init__(self, connection: socket.socket, key: str, lock: threading.Lock):
+        self._connection = connection
+        self._key = key
+        self._lock = lock
+        self.closed = False
+
+    def write(self, text: str) -> int:
+        # Click tells text streams from binary ones by writing bytes
+        if not isinstance(text, str):
+            raise TypeError("write() argument must be str")
+        if text and not self.closed:
+            with self._lock:
+                try:
+                    send_message(self._connection, {self._key: text})
+                except OSError:
+                    self.closed = True
+        return len(text)
+
+    def writelines(self, lines: Iterable[str]):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+    def writable(self) -> bool:
+        return True
+
+
+class WorkspaceDaemon:
+    """Server executing forwarded commands with warm caches.
+
+    Commands run one at a time, they change working directory and output
+    of the whole process is redirected to client of the command.
+
+    Args:
+        cli (click.Group): Command group of 'manage.py'.
+        poll_interval (float): Seconds between polls of addon folders
+            when 'watchdog' is not available.
+    """
+
+    def __init__(self, cli, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.cli = cli
+        self.poll_interval = poll_interval
+        self.started = time.time()
+        self.commands = 0
+        self.refreshes = 0
+        self.watcher = None
+        self.code_signature = get_code_signature()
+        # Environment before '.env' is loaded by command modules
+        self.env = get_client_env()
+        self._command_lock = threading.Lock()
+        self._dirty_addons = set()
+        self._dirty_lock = threading.Lock()
+        self._dirty_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._server = None
+
+    def serve(self):
+        import signal
+        import socketserver
+
+        socket_path = get_socket_path()
+        if connect() is not None:
+            raise RuntimeError(f"Daemon is already running on {socket_path}")
+        if os.path.exists(socket_path):
+            # Left by daemon which was killed
+            os.remove(socket_path)
+        os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                daemon.handle(self.connection, self.rfile)
+
+        # Socket is created accessible only by the user, changing its mode
+        #   after bind would leave a window for other users to connect
+        previous_umask = os.umask(0o077)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(
+                socket_path, Handler
+            )
+        finally:
+            os.umask(previous_umask)
+        self._server.daemon_threads = True
+        # Clean up the socket when stopped by 'kill'
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            self._warm_up()
+            self._start_watcher()
+            threading.Thread(target=self._refresh_loop, daemon=True).start()
+            print(f"Workspace daemon {os.getpid()} listening on {socket_path}")
+            sys.stdout.flush()
+            self._server.serve_forever()
+        finally:
+            self._stop_event.set()
+            self._dirty_event.set()
+            if self.watcher is not None and self.watcher != "polling":
+                self.watcher.stop()
+            self._server.server_close()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            print("Workspace daemon stopped")
+
+    def stop(self):
+        # 'shutdown' waits for 'serve_forever' loop, must not block handler
+        threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def handle(self, connection: socket.socket, rfile):
+        line = rfile.readline()
+        if not line:
+            return
+        message = json.loads(line)
+        message_type = message.get("type")
+        if message_type == "status":
+            send_message(connection, self.get_status())
+        elif message_type == "stop":
+            send_message(connection, {"stopped": os.getpid()})
+            self.stop()
+        elif message_type == "run":
+            self.run_command(connection, message)
+
+    def get_status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started,
+            "commands": self.commands,
+            "refreshes": self.refreshes,
+            "watcher": "polling" if self.watcher == "polling" else "watchdog",
+            "socket": get_socket_path(),
+        }
+
+    def run_command(self, connection: socket.socket, message: dict):
+        if get_code_signature() != self.code_signature:
+            send_message(
+                connection,
+                {
+                    "fallback": (
+                        "Workspace daemon was stopped, manage.py or its"
+                        " scripts changed since it started."
+                    ),
+                    "notice": True,
+                },
+            )
+            self.stop()
+            return
+        if message["env"] != self.env:
+            send_message(
+                connection, {"fallback": "Environment differs from daemon."}
+            )
+            return
+
+        write_lock = threading.Lock()
+        stdout = _SocketStream(connection, "out", write_lock)
+        stderr = _SocketStream(connection, "err", write_lock)
+        with self._command_lock:
+            exit_code = self._run_cli(
+                message["args"], message["cwd"], message["columns"],
+                stdout, stderr,
+            )
+            self.commands += 1
+        if not stdout.closed:
+            try:
+                send_message(connection, {"exit": exit_code})
+            except OSError:
+                pass
+
+    def _run_cli(self, args, cwd, columns, stdout, stderr) -> int:
+        import click
+        import traceback
+
+        previous_cwd = os.getcwd()
+        try:
+            os.chdir(cwd)
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(
+                stderr
+            ):
+                result = self.cli.main(
+                    args=args,
+                    prog_name="manage.py",
+                    standalone_mode=False,
+                    terminal_width=columns,
+                )
+                return result if isinstance(result, int) else 0
+        except click.ClickException as exc:
+            with contextlib.redirect_stderr(stderr):
+                exc.show()
+            return exc.exit_code
+        except click.Abort:
+            stderr.write("Aborted!\n")
+            return 1
+        except SystemExit as exc:
+            if exc.code is None or isinstance(exc.code, int):
+                return exc.code or 0
+            stderr.write(f"{exc.code}\n")
+            return 1
+        except Exception:
+            stderr.write(traceback.format_exc())
+            return 1
+        finally:
+            os.chdir(previous_cwd)
+
+    def _warm_up(self):
+        """Import command modules and log in to server ahead of commands."""
+        for addon_path in self._get_addon_paths():
+            self._refresh_addon(addon_path)
+        try:
+            import ayon_api
+            import upload_addons  # noqa: F401
+
+            ayon_api.get_server_api_connection()
+        except Exception as exc:
+            # Commands log in themselves and report the error
+            print(f"Server connection is not available: {exc}")
+
+    def _get_addon_paths(self) -> list:
+        if not ADDONS_FOLDER.exists():
+            return []
+        return sorted(
+            path for path in ADDONS_FOLDER.iterdir()
+            if path.is_dir() and (path / "package.py").exists()
+        )
+
+    def _refresh_addon(self, addon_path: pathlib.Path):
+        """Load metadata and fingerprints of addon changed on disk."""
+        import addon_index
+        import fingerprint_index
+
+        if not addon_path.is_dir():
+            return
+        try:
+            addon_index.get_addon(addon_path)
+            fingerprint_index.get_index(addon_path).scan()
+        except Exception as exc:
+            print(f"Failed to refresh {addon_path.name}: {exc}")
+        self.refreshes += 1
+
+    def mark_dirty(self, path: str):
+        """Mark addon containing path to be refreshed."""
+        try:
+            relative = pathlib.Path(path).resolve().relative_to(
+                ADDONS_FOLDER.resolve()
+            )
+        except ValueError:
+            return
+        if not relative.parts:
+            return
+        # Caches are written by commands and by the refresh itself
+        if len(relative.parts) > 1 and relative.parts[1] == ".cache":
+            return
+        with self._dirty_lock:
+            self._dirty_addons.add(relative.parts[0])
+        self._dirty_event.set()
+
+    def _start_watcher(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            self.watcher = "polling"
+            threading.Thread(target=self._poll_loop, daemon=True).start()
+            return
+
+        daemon = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                daemon.mark_dirty(event.src_path)
+                dest_path = getattr(event, "dest_path", None)
+                if dest_path:
+                    daemon.mark_dirty(dest_path)
+
+        ADDONS_FOLDER.mkdir(exist_ok=True)
+        self.watcher = Observer()
+        self.watcher.schedule(Handler(), ADDONS_FOLDER.as_posix(), recursive=True)
+        self.watcher.daemon = True
+        self.watcher.start()
+
+    def _get_snapshot(self, addon_path: pathlib.Path) -> dict:
+        """Stat of addon source files, cheap to compare between polls."""
+        import fingerprint_index
+
+        return {
+            rel_path: (file_stat.st_mtime_ns, file_stat.st_size)
+            for _, rel_path, file_stat in fingerprint_index.iter_tree(
+                addon_path.as_posix(),
+                fingerprint_index.DEFAULT_SOURCES + POLL_GIT_FILES,
+            )
+        }
+
+    def _poll_loop(self):
+        # Only addons with changed snapshot are refreshed, first poll
+        #   refreshes all of them to catch changes made since warm up
+        snapshots = {}
+        while not self._stop_event.wait(self.poll_interval):
+            addon_paths = self._get_addon_paths()
+            for addon_path in addon_paths:
+                try:
+                    snapshot = self._get_snapshot(addon_path)
+                except OSError:
+                    # Files removed while the tree was walked
+                    continue
+                if snapshots.get(addon_path.name) != snapshot:
+                    snapshots[addon_path.name] = snapshot
+                    self.mark_dirty(addon_path.as_posix())
+            names = {addon_path.name for addon_path in addon_paths}
+            for name in set(snapshots) - names:
+                del snapshots[name]
+
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            self._dirty_event.wait()
+            if self._stop_event.wait(DEBOUNCE_INTERVAL):
+                return
+            # Commands refresh what they need themselves, try again later
+            if not self._command_lock.acquire(blocking=False):
+                continue
+            try:
+                with self._dirty_lock:
+                    addon_names = sorted(self._dirty_addons)
+                    self._dirty_addons.clear()
+                    self._dirty_event.clear()
+                for addon_name in addon_names:
+                    self._refresh_addon(ADDONS_FOLDER / addon_name)
+            finally:
+                self._command_lock.release()
@@ -0,0 +1,35 @@
+import http.server
+import pathlib
+import sys
+import threading
+
+import pytest
+
+ROOT_PATH = pathlib.Path(__file__).parent.parent
+sys.path.insert(0, (ROOT_PATH / "scripts").as_posix())
+# 'manage.py' is imported as module by tests of its commands
+sys.path.insert(0, ROOT_PATH.as_posix())
+
+
+@pytest.fixture
+def http_server():
+    """Start stand-in server with given request handler class.
+
+    Yields:
+        Callable[[type], str]: Starts server, returns its url.
+    """
+    servers = []
+
+    def start(handler_class) -> str:
+        server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), handler_class
+        )
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
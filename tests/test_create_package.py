@@ -0,0 +1,141 @@
+import os
+import shutil
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+from benchmark_client_sync import compare_trees
+
+from conftest import ROOT_PATH
+
+CREATE_PACKAGE_PATH = ROOT_PATH / "scripts" / "addon-resources" / "create_package.py"
+PACKAGE_PY = """name = "my_addon"
+title = "My Addon"
+version = "1.0.0"
+client_dir = "my_addon"
+"""
+
+
+@pytest.fixture
+def addon(tmp_path):
+    """Synthetic addon in a workspace, returns path to its folder."""
+    # Addon loads 'fingerprint_index' from 'scripts' of its workspace
+    (tmp_path / "scripts").symlink_to(ROOT_PATH / "scripts")
+    addon_path = tmp_path / "addons" / "my_addon"
+    client_path = addon_path / "client" / "my_addon"
+    for path in (client_path / "plugins", addon_path / "server"):
+        path.mkdir(parents=True)
+    shutil.copy(CREATE_PACKAGE_PATH, addon_path / "create_package.py")
+    (addon_path / "package.py").write_text(PACKAGE_PY)
+    (addon_path / "server" / "__init__.py").write_text("ADDON = True\n")
+    (client_path / "__init__.py").write_text("")
+    for index in range(20):
+        (client_path / "plugins" / f"plugin_{index}.py").write_text(
+            f"NAME = 'plugin_{index}'\n" * (index + 1) * 50
+        )
+    return addon_path
+
+
+def create_package(addon_path, *args):
+    """Run 'create_package.py' of the addon, returns its log."""
+    process = subprocess.run(
+        [sys.executable, "create_package.py", *map(str, args)],
+        cwd=addon_path,
+        env={**os.environ, "SOURCE_DATE_EPOCH": "1700000000"},
+        capture_output=True,
+        text=True,
+    )
+    assert process.returncode == 0, process.stderr
+    return process.stderr
+
+
+def package_path(output_dir):
+    return output_dir / "my_addon-1.0.0.zip"
+
+
+def test_package_is_reproducible_with_any_jobs(addon, tmp_path):
+    create_package(addon, "-o", tmp_path / "first", "-j", 1, "--no-cache")
+    # Later mtimes of sources do not leak to the package
+    for path in addon.rglob("*.py"):
+        os.utime(path, (2000000000, 2000000000))
+    create_package(addon, "-o", tmp_path / "second", "-j", 4, "--no-cache")
+
+    first = package_path(tmp_path / "first").read_bytes()
+    assert first == package_path(tmp_path / "second").read_bytes()
+
+
+def test_updated_client_zip_equals_full_build(addon, tmp_path):
+    create_package(addon, "-o", tmp_path / "cached")
+    plugin_path = addon / "client" / "my_addon" / "plugins" / "plugin_3.py"
+    plugin_path.write_text("NAME = 'edited'\n")
+
+    log = create_package(addon, "-o", tmp_path / "cached")
+    assert "Client zip updated, 1 of 21 files compressed" in log
+    create_package(addon, "-o", tmp_path / "full", "--no-cache")
+
+    cached_path = package_path(tmp_path / "cached")
+    full_path = package_path(tmp_path / "full")
+    assert cached_path.read_bytes() == full_path.read_bytes()
+    with zipfile.ZipFile(cached_path) as zipf:
+        assert zipf.testzip() is None
+        client_zip = zipf.extract("private/client.zip", tmp_path)
+    with zipfile.ZipFile(client_zip) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.read("my_addon/plugins/plugin_3.py") == b"NAME = 'edited'\n"
+
+
+def test_sync_client_code(addon, tmp_path):
+    output_dir = tmp_path / "client"
+    client_path = addon / "client" / "my_addon"
+    synced_path = output_dir / "my_addon"
+    create_package(addon, "--only-client", "--sync", "-o", output_dir)
+    assert synced_path.is_symlink()
+    assert compare_trees(client_path, synced_path) == []
+
+    unchanged_inode = (synced_path / "plugins" / "plugin_1.py").stat().st_ino
+    (client_path / "plugins" / "plugin_3.py").write_text("NAME = 'edited'\n")
+    (client_path / "plugins" / "plugin_4.py").unlink()
+    log = create_package(addon, "--only-client", "--sync", "-o", output_dir)
+    assert "1 files copied, 19 linked, 1 removed" in log
+    assert compare_trees(client_path, synced_path) == []
+    plugin_path = synced_path / "plugins" / "plugin_1.py"
+    assert plugin_path.stat().st_ino == unchanged_inode
+
+    # Copy without '--sync' replaces the symlink with a real folder
+    create_package(addon, "--only-client", "-o", output_dir)
+    assert not synced_path.is_symlink()
+    assert synced_path.is_dir()
+    assert compare_trees(client_path, synced_path) == []
+    assert [path.name for path in output_dir.iterdir()] == ["my_addon"]
+
+
+def test_unchanged_package_is_reused(addon, tmp_path):
+    create_package(addon, "-o", tmp_path)
+    package_stat = package_path(tmp_path).stat()
+
+    log = create_package(addon, "-o", tmp_path)
+    assert "Package is up to date" in log
+    assert package_path(tmp_path).stat().st_mtime_ns == package_stat.st_mtime_ns
+
+
+def test_source_edit_invalidates_cache(addon, tmp_path):
+    create_package(addon, "-o", tmp_path)
+    (addon / "server" / "__init__.py").write_text("ADDON = False\n")
+
+    log = create_package(addon, "-o", tmp_path)
+    assert "Package is up to date" not in log
+    assert "Reused cached client zip" in log
+    with zipfile.ZipFile(package_path(tmp_path)) as zipf:
+        assert zipf.read("server/__init__.py") == b"ADDON = False\n"
+
+
+def test_no_cache_rebuilds_package(addon, tmp_path):
+    create_package(addon, "-o", tmp_path)
+    package_stat = package_path(tmp_path).stat()
+
+    log = create_package(addon, "-o", tmp_path, "--no-cache")
+    assert "Package is up to date" not in log
+    assert "Client zip created" in log
+    assert package_path(tmp_path).stat().st_mtime_ns != package_stat.st_mtime_ns
@@ -0,0 +1,84 @@
+import pytest
+
+import env_cache
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Addons folder and environment cache in tmp_path.
+
+    Environments are created without venv and poetry, the install writes
+    'poetry.lock' when it is missing like 'poetry install' does.
+    """
+    envs_folder = tmp_path / "envs"
+    monkeypatch.setattr(env_cache, "ENVS_FOLDER", envs_folder)
+    monkeypatch.setattr(env_cache, "INDEX_FILE", envs_folder / "index.json")
+    monkeypatch.setattr(env_cache, "ADDONS_FOLDER", tmp_path / "addons")
+    created = []
+
+    def create_environment(addon_folder, env_path):
+        env_path.mkdir(parents=True)
+        assert env_cache._link_environment(addon_folder, env_path)
+        lock_file = addon_folder / "poetry.lock"
+        if not lock_file.exists():
+            lock_file.write_text("resolved")
+        (env_path / env_cache.READY_FILE).touch()
+        created.append(env_path.name)
+
+    monkeypatch.setattr(env_cache, "_create_environment", create_environment)
+    return created
+
+
+def create_addon(name, tmp_path, lock=None):
+    addon_folder = tmp_path / "addons" / name
+    addon_folder.mkdir(parents=True)
+    (addon_folder / "pyproject.toml").write_text(
+        '[tool.poetry]\nname = "addon"\n\n'
+        '[tool.poetry.dependencies]\nruff = "^0.3"\n'
+    )
+    if lock is not None:
+        (addon_folder / "poetry.lock").write_text(lock)
+    return addon_folder
+
+
+def test_environment_is_found_after_install_wrote_lock(tmp_path, workspace):
+    addon_folder = create_addon("a", tmp_path)
+    env_path = env_cache.ensure_environment(addon_folder)
+
+    assert (addon_folder / "poetry.lock").exists()
+    assert env_cache.ensure_environment(addon_folder) == env_path
+    assert workspace == [env_path.name]
+
+
+def test_environment_is_keyed_by_lock(tmp_path, workspace):
+    first = create_addon("a", tmp_path, lock="first")
+    second = create_addon("b", tmp_path, lock="second")
+    same = create_addon("c", tmp_path, lock="first")
+
+    first_env = env_cache.ensure_environment(first)
+    assert env_cache.ensure_environment(second) != first_env
+    assert env_cache.ensure_environment(same) == first_env
+    assert len(workspace) == 2
+
+
+def test_changed_lock_creates_environment(tmp_path, workspace):
+    addon_folder = create_addon("a", tmp_path, lock="first")
+    env_path = env_cache.ensure_environment(addon_folder)
+    (addon_folder / "poetry.lock").write_text("updated")
+
+    assert env_cache.ensure_environment(addon_folder) != env_path
+    assert len(workspace) == 2
+
+
+def test_eviction_keeps_linked_environments(tmp_path, workspace):
+    for name, lock in (("a", "first"), ("b", "second"), ("c", "third")):
+        env_cache.ensure_environment(create_addon(name, tmp_path, lock=lock))
+    # Environment of 'a' is not linked anymore
+    (tmp_path / "addons" / "a" / ".venv").unlink()
+
+    removed = env_cache.evict_environments(max_envs=1)
+
+    assert removed == [workspace[0]]
+    assert sorted(path.name for path in env_cache.ENVS_FOLDER.iterdir()) == (
+        sorted(workspace[1:] + ["index.json"])
+    )
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import manage
+
+
+def test_tasks_sharing_path_run_in_order(tmp_path):
+    lock = threading.Lock()
+    active = {}
+    overlaps = []
+    calls = []
+
+    def task(name, path, repository, branch):
+        with lock:
+            active[path] = active.get(path, 0) + 1
+            if active[path] > 1:
+                overlaps.append(path)
+            calls.append(f"{name}@{branch}")
+        time.sleep(0.05)
+        with lock:
+            active[path] -= 1
+        if branch == "broken":
+            raise RuntimeError("build failed")
+        return "built"
+
+    addon_path = tmp_path / "addon"
+    other_path = tmp_path / "other"
+    releases = [
+        ("addon", addon_path, "url", "main"),
+        ("addon", addon_path, "url", "develop"),
+        ("addon", addon_path, "url", "broken"),
+        ("other", other_path, "url", "main"),
+    ]
+    succeeded, failed = manage.run_repository_tasks(
+        task,
+        releases,
+        jobs=4,
+        get_label=lambda release: f"{release[0]}@{release[3]}",
+    )
+
+    assert overlaps == []
+    addon_calls = [call for call in calls if call.startswith("addon@")]
+    assert addon_calls == ["addon@main", "addon@develop", "addon@broken"]
+    assert sorted(succeeded) == ["addon@develop", "addon@main", "other@main"]
+    assert failed == {"addon@broken": "build failed"}
+
+
+def test_tasks_without_path_run_in_parallel():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def task(name, path, url):
+        barrier.wait()
+        return "done"
+
+    succeeded, failed = manage.run_repository_tasks(
+        task, [(name, None, "url") for name in "abc"], jobs=3
+    )
+    assert sorted(succeeded) == ["a", "b", "c"]
+    assert failed == {}
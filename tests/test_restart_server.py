@@ -0,0 +1,54 @@
+import ayon_api
+import pytest
+
+import upload_addons
+
+
+class FakeConnection:
+    """Connection answering 'get_info' with queued responses."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.restarted = False
+        self.calls = 0
+
+    def trigger_server_restart(self):
+        self.restarted = True
+
+    def get_info(self):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def restart(monkeypatch):
+    monkeypatch.setattr(upload_addons.time, "sleep", lambda seconds: None)
+
+    def run(responses, timeout=upload_addons.RESTART_TIMEOUT):
+        connection = FakeConnection(responses)
+        monkeypatch.setattr(
+            ayon_api, "get_server_api_connection", lambda: connection
+        )
+        upload_addons.restart_and_wait_for_server(timeout)
+        return connection
+
+    return run
+
+
+def test_waits_for_uptime_after_restart(restart):
+    connection = restart([{"uptime": 3600.0}, {"uptime": 0.0}])
+    assert connection.restarted
+    assert connection.calls == 2
+
+
+def test_waits_for_server_down_without_uptime(restart):
+    connection = restart([{}, {}, ConnectionError(), {}])
+    assert connection.calls == 4
+
+
+def test_times_out_when_server_does_not_restart(restart):
+    with pytest.raises(TimeoutError):
+        restart([{"uptime": 3600.0}] * 2, timeout=-1)
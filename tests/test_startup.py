@@ -0,0 +1,19 @@
+import pytest
+
+import benchmark_startup
+
+REPEAT = 3
+
+
+@pytest.fixture(scope="module")
+def interpreter_startup():
+    return benchmark_startup.get_interpreter_startup(REPEAT)
+
+
+@pytest.mark.parametrize(
+    "command", benchmark_startup.COMMANDS, ids=" ".join
+)
+def test_command_starts_within_budget(command, interpreter_startup):
+    elapsed, imports = benchmark_startup.measure_command(command, REPEAT)
+    assert benchmark_startup.get_heavy_imports(imports) == []
+    assert elapsed - interpreter_startup <= benchmark_startup.DEFAULT_BUDGET
@@ -0,0 +1,135 @@
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import manage
+
+
+def git(path, *args):
+    return subprocess.run(
+        [
+            "git",
+            "-c", "user.name=Test",
+            "-c", "user.email=test@example.com",
+            *args,
+        ],
+        cwd=path,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """Bare repository with one commit.
+
+    Returns function pushing new content of the file, it returns the new
+    commit and has url of the repository in its 'url' attribute.
+    """
+    url = tmp_path / "upstream.git"
+    git(tmp_path, "init", "--quiet", "--bare", "-b", "main", url.as_posix())
+    work_tree = tmp_path / "work"
+    git(tmp_path, "clone", "--quiet", url.as_posix(), work_tree.as_posix())
+    git(work_tree, "switch", "--quiet", "-c", "main")
+
+    (work_tree / "file.txt").write_text("1")
+    git(work_tree, "add", "file.txt")
+    git(work_tree, "commit", "--quiet", "-m", "1")
+    git(work_tree, "push", "--quiet", "origin", "main")
+
+    def push(content):
+        (work_tree / "file.txt").write_text(content)
+        git(work_tree, "commit", "--quiet", "-am", content)
+        git(work_tree, "push", "--quiet", "origin", "main")
+        return git(work_tree, "rev-parse", "HEAD")
+
+    push.url = url.as_posix()
+    return push
+
+
+def test_clone_borrows_mirror(tmp_path, upstream):
+    mirror_cache = tmp_path / "mirrors"
+    path = tmp_path / "addons" / "addon"
+    result = manage.get_repository("addon", path, upstream.url, mirror_cache)
+
+    assert result == "cloned"
+    mirror_path = manage.get_mirror_path(mirror_cache, upstream.url)
+    assert (mirror_path / "HEAD").exists()
+    # Objects are copied from the mirror, clone does not depend on it
+    assert not (path / ".git" / "objects" / "info" / "alternates").exists()
+    assert (path / "file.txt").read_text() == "1"
+
+    # Next clone refreshes the mirror with new commits first
+    head = upstream("2")
+    other_path = tmp_path / "addons" / "other"
+    manage.get_repository("other", other_path, upstream.url, mirror_cache)
+    assert git(mirror_path, "rev-parse", "main") == head
+    assert git(other_path, "rev-parse", "HEAD") == head
+
+
+def test_sync_clones_missing_repository(tmp_path, upstream):
+    path = tmp_path / "addon"
+    result = manage.sync_repository(
+        "addon", path, upstream.url, tmp_path / "mirrors"
+    )
+    assert result == "cloned"
+    assert (path / "file.txt").read_text() == "1"
+
+
+def test_sync_fast_forwards(tmp_path, upstream):
+    path = tmp_path / "addon"
+    manage.get_repository("addon", path, upstream.url)
+    assert manage.sync_repository("addon", path, upstream.url) == "up to date"
+
+    old_head = git(path, "rev-parse", "HEAD")
+    head = upstream("2")
+    result = manage.sync_repository("addon", path, upstream.url)
+
+    assert result == f"updated {old_head[:8]}..{head[:8]}"
+    assert git(path, "rev-parse", "HEAD") == head
+    assert (path / "file.txt").read_text() == "2"
+
+
+def test_sync_skips_dirty_checkout(tmp_path, upstream):
+    path = tmp_path / "addon"
+    manage.get_repository("addon", path, upstream.url)
+    old_head = git(path, "rev-parse", "HEAD")
+    upstream("2")
+    (path / "file.txt").write_text("local change")
+
+    result = manage.sync_repository("addon", path, upstream.url)
+
+    assert result == "skipped, dirty working tree"
+    assert git(path, "rev-parse", "HEAD") == old_head
+    assert (path / "file.txt").read_text() == "local change"
+
+
+def test_sync_skips_detached_head(tmp_path, upstream):
+    path = tmp_path / "addon"
+    manage.get_repository("addon", path, upstream.url)
+    git(path, "switch", "--quiet", "--detach")
+    upstream("2")
+    assert manage.sync_repository("addon", path, upstream.url) == (
+        "skipped, detached HEAD"
+    )
+
+
+def test_mirror_created_by_concurrent_processes(tmp_path, upstream, monkeypatch):
+    # Each call gets its own lock like separate processes sharing the cache
+    monkeypatch.setattr(manage, "_get_mirror_lock", lambda path: threading.Lock())
+    mirror_cache = tmp_path / "mirrors"
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(
+            lambda _: manage.update_mirror(mirror_cache, upstream.url),
+            range(4),
+        ))
+
+    assert "mirror created" in results
+    mirror_path = manage.get_mirror_path(mirror_cache, upstream.url)
+    assert git(mirror_path, "rev-parse", "main")
+    assert [path.name for path in mirror_path.parent.iterdir()] == [
+        mirror_path.name
+    ]
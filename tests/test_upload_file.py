@@ -0,0 +1,172 @@
+import http.server
+import json
+import os
+import time
+
+import pytest
+
+import upload_addons
+
+SIZE = 3 * upload_addons.UPLOAD_CHUNK_SIZE + 123
+
+
+class FakeConnection:
+    ssl_verify = True
+    cert = None
+
+    def __init__(self, url):
+        self._url = url
+
+    def get_rest_url(self):
+        return f"{self._url}/api"
+
+    def get_headers(self):
+        return {"Authorization": "Bearer token"}
+
+
+class UploadHandler(http.server.BaseHTTPRequestHandler):
+    """Server receiving upload, its failures are set by class attributes.
+
+    'drop_after' bytes of the first upload are received before connection
+    is closed, 'fail_statuses' are answered to the first uploads and the
+    first upload is answered after 'stall' seconds.
+    """
+
+    protocol_version = "HTTP/1.1"
+    accept_ranges = True
+    drop_after = None
+    fail_statuses = []
+    stall = 0.0
+    received = bytearray()
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, status, headers=None, body=b""):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        headers = {"Accept-Ranges": "bytes"} if self.accept_ranges else {}
+        self._respond(200, headers)
+
+    def do_POST(self):
+        cls = type(self)
+        length = int(self.headers["Content-Length"])
+        content_range = self.headers.get("Content-Range")
+        cls.requests.append(content_range)
+
+        if content_range and content_range.startswith("bytes */"):
+            headers = {}
+            if cls.received:
+                headers["Range"] = f"bytes=0-{len(cls.received) - 1}"
+            self._respond(308, headers)
+            return
+
+        offset = 0
+        if content_range:
+            offset = int(content_range.split(" ")[1].split("-")[0])
+        del cls.received[offset:]
+
+        if cls.drop_after is not None:
+            cls.received += self.rfile.read(cls.drop_after)
+            cls.drop_after = None
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+
+        data = self.rfile.read(length)
+        if cls.stall:
+            time.sleep(cls.stall)
+            cls.stall = 0.0
+            return
+        if cls.fail_statuses:
+            self._respond(cls.fail_statuses.pop(0))
+            return
+        cls.received += data
+        self._respond(200, body=json.dumps({"size": len(cls.received)}).encode())
+
+
+@pytest.fixture
+def upload(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_addons, "UPLOAD_BACKOFF", 0.0)
+    content = os.urandom(SIZE)
+    filepath = tmp_path / "addon-1.0.0.zip"
+    filepath.write_bytes(content)
+
+    def run(retries=upload_addons.UPLOAD_RETRIES, **attributes):
+        handler = type(
+            "Handler",
+            (UploadHandler,),
+            {"received": bytearray(), "requests": [], **attributes},
+        )
+        connection = FakeConnection(http_server(handler))
+        upload_addons._worker_data.session = None
+        response = upload_addons.upload_file(
+            connection, "addons/install", filepath, retries
+        )
+        return handler, response
+
+    run.content = content
+    return run
+
+
+def test_upload_without_failures(upload):
+    handler, response = upload()
+    assert response.json() == {"size": SIZE}
+    assert bytes(handler.received) == upload.content
+    assert handler.requests == [None]
+
+
+def test_upload_resumes_after_dropped_connection(upload):
+    drop_after = upload_addons.UPLOAD_CHUNK_SIZE
+    handler, response = upload(drop_after=drop_after)
+    assert bytes(handler.received) == upload.content
+    # Second attempt sends only the rest of the file
+    assert handler.requests == [
+        None,
+        f"bytes */{SIZE}",
+        f"bytes {drop_after}-{SIZE - 1}/{SIZE}",
+    ]
+
+
+def test_upload_restarts_without_resume_support(upload):
+    handler, response = upload(
+        accept_ranges=False, drop_after=upload_addons.UPLOAD_CHUNK_SIZE
+    )
+    assert bytes(handler.received) == upload.content
+    assert handler.requests == [None, None]
+
+
+def test_upload_retries_unavailable_server(upload):
+    handler, response = upload(fail_statuses=[503, 502])
+    assert response.status_code == 200
+    assert bytes(handler.received) == upload.content
+    assert handler.requests == [None, f"bytes */{SIZE}"] * 2 + [None]
+
+
+def test_upload_fails_after_retries(upload):
+    with pytest.raises(RuntimeError, match="after 2 attempts"):
+        upload(retries=1, fail_statuses=[503, 503, 503])
+
+
+def test_upload_retries_stalled_server(upload, monkeypatch):
+    monkeypatch.setattr(upload_addons, "UPLOAD_TIMEOUT", (5, 0.5))
+    handler, response = upload(stall=2.0)
+    assert bytes(handler.received) == upload.content
+    assert handler.requests[-1] is None
+
+
+def test_upload_session_uses_connection_certificates():
+    connection = FakeConnection("http://127.0.0.1")
+    connection.ssl_verify = "/path/to/ca.pem"
+    connection.cert = "/path/to/cert.pem"
+    upload_addons._worker_data.session = None
+    session = upload_addons.get_upload_session(connection)
+    assert session.verify == "/path/to/ca.pem"
+    assert session.cert == "/path/to/cert.pem"
@@ -0,0 +1,167 @@
+import http.server
+import json
+import zipfile
+
+import ayon_api
+import pytest
+from click.testing import CliRunner
+
+import upload_addons
+
+
+class AyonHandler(http.server.BaseHTTPRequestHandler):
+    """Stand-in AYON server listing addons and installing uploaded zips."""
+
+    protocol_version = "HTTP/1.1"
+    addons = {}
+    uploads = []
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        self._respond(200, {})
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/api/addons":
+            self._respond(200, {"addons": [
+                {"name": name, "versions": {version: {} for version in versions}}
+                for name, versions in self.addons.items()
+            ]})
+        elif path in ("/", "/api/info"):
+            self._respond(200, {"version": "1.5.0"})
+        elif path == "/api/users/me":
+            self._respond(200, {"name": "admin", "data": {"isAdmin": True}})
+        else:
+            self._respond(404, {"detail": path})
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        data = self.rfile.read(int(self.headers["Content-Length"]))
+        if path != "/api/addons/install":
+            self._respond(404, {"detail": path})
+            return
+        name, version = self.headers["x-file-name"][:-4].split("-")
+        self.uploads.append((name, version, data))
+        self.addons.setdefault(name, set()).add(version)
+        self._respond(200, {"eventId": str(len(self.uploads))})
+
+
+@pytest.fixture
+def server(http_server, tmp_path, monkeypatch):
+    handler = type("Handler", (AyonHandler,), {"addons": {}, "uploads": []})
+    connection = ayon_api.ServerAPI(http_server(handler), token="token")
+    monkeypatch.setattr(ayon_api, "get_addons_info", connection.get_addons_info)
+    monkeypatch.setattr(
+        upload_addons, "UPLOAD_LEDGER_FILE", tmp_path / "upload_ledger.json"
+    )
+    monkeypatch.setattr(ayon_api, "get_base_url", connection.get_base_url)
+    monkeypatch.setattr(
+        ayon_api, "get_server_api_connection", lambda: connection
+    )
+    monkeypatch.setattr(upload_addons, "ADDONS_FOLDER", tmp_path / "addons")
+    (tmp_path / "addons" / "my_addon").mkdir(parents=True)
+    upload_addons._worker_data.session = None
+    upload_addons._worker_data.connection = None
+    monkeypatch.setattr(upload_addons, "_idle_workers", [])
+    handler.connection = connection
+    return handler
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """Package returned by 'package_addon', 'content' changes its digest."""
+    package_zip = tmp_path / "my_addon-1.0.0.zip"
+    state = {"content": "first"}
+
+    def package_addon(addon_name, in_process=True):
+        with zipfile.ZipFile(package_zip, "w") as zipf:
+            # Fixed timestamp, the same content gives the same digest
+            zipf.writestr(
+                zipfile.ZipInfo("package.py", (1980, 1, 1, 0, 0, 0)),
+                state["content"],
+            )
+        return upload_addons.AddonPackage(
+            addon_name,
+            "my_addon",
+            "1.0.0",
+            package_zip,
+            upload_addons.get_package_digest(package_zip),
+        )
+
+    monkeypatch.setattr(upload_addons, "package_addon", package_addon)
+    return state
+
+
+def upload(server, force=False):
+    return upload_addons.upload_addon(
+        "my_addon",
+        upload_addons.get_server_addons(),
+        upload_addons.load_upload_ledger(),
+        force,
+        server.connection,
+    )
+
+
+def test_same_package_is_skipped(server, package):
+    assert upload(server) is True
+    ledger = upload_addons.load_upload_ledger()
+    server_ledger = ledger[server.connection.get_base_url()]
+    assert list(server_ledger["my_addon"]) == ["1.0.0"]
+
+    assert upload(server) is False
+    assert len(server.uploads) == 1
+
+
+def test_force_uploads_same_package(server, package):
+    upload(server)
+    assert upload(server, force=True) is True
+    assert len(server.uploads) == 2
+
+
+def test_changed_package_of_same_version_is_uploaded(server, package):
+    upload(server)
+    package["content"] = "second"
+    assert upload(server) is True
+    assert len(server.uploads) == 2
+
+
+def test_version_uploaded_elsewhere_is_uploaded(server, package):
+    # Server has the version but the ledger holds no digest of it
+    server.addons["my_addon"] = {"1.0.0"}
+    assert upload(server) is True
+    assert len(server.uploads) == 1
+
+
+def test_pipeline_uploads_and_skips(server, package):
+    results = upload_addons.upload_addons(["my_addon"], jobs=1)
+    assert [result.status for result in results] == ["uploaded"]
+    results = upload_addons.upload_addons(["my_addon"], jobs=1)
+    assert [result.status for result in results] == ["skipped"]
+    assert len(server.uploads) == 1
+
+
+def test_pipeline_reports_dedup_error(server, package, monkeypatch):
+    def is_package_on_server(*args):
+        raise RuntimeError("ledger is broken")
+
+    monkeypatch.setattr(
+        upload_addons, "is_package_on_server", is_package_on_server
+    )
+    results = upload_addons.upload_addons(["my_addon"], jobs=1)
+    assert [(result.status, result.error) for result in results] == [
+        ("failed", "ledger is broken")
+    ]
+
+    result = CliRunner().invoke(upload_addons.upload_addons_cli, ["my_addon"])
+    assert result.exit_code == 1
+    assert server.uploads == []